@@ -0,0 +1,248 @@
+"""Storage and rendering benchmarks at 1k, 100k and 1M todos.
+
+Every case runs in process against a throwaway SQLite database standing in for
+the server, so the numbers cover the app functions, the backend and rich, but
+no network time. Results can be saved as a JSON baseline and later runs
+compared against it, failing when a case got slower than the threshold.
+
+    python benchmarks/hot_paths.py --json baseline.json
+    python benchmarks/hot_paths.py --compare baseline.json --threshold 25
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from itertools import cycle
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from rich.console import Console  # noqa: E402
+
+from todo.src.app import (  # noqa: E402
+    add_todo,
+    delete_todos,
+    display_table,
+    list_pages,
+    list_todos,
+    make_filter,
+    mark_all_as_done,
+    mark_as_done,
+    mark_done_where,
+    write_rows,
+)
+from todo.src.model import Todo  # noqa: E402
+from todo.src.storage import set_backend  # noqa: E402
+from todo.src.storage.sqlite import SqliteBackend  # noqa: E402
+
+USER = "bench"
+SIZES = [1_000, 100_000, 1_000_000]
+SEED_BATCH = 10_000
+OPS = 100
+BULK = 1_000
+# Bulk cases touch at most this share of the seeded todos per run, so small
+# sizes keep enough open and undeleted rows for the cases that follow
+BULK_SHARE = 20
+RENDERED = 1_000
+# Differences smaller than this are timer noise, never report them
+MIN_DELTA_MS = 1.0
+PRIORITIES = ["low", "medium", "high"]
+
+
+def seed(backend: SqliteBackend, size: int) -> list[str]:
+    random.seed(size)
+    start = datetime(2024, 1, 1)
+    for offset in range(0, size, SEED_BATCH):
+        backend.add_many(
+            USER,
+            [
+                Todo(
+                    None,
+                    f"todo {offset + i} {random.choice(['milk', 'mail', 'bank'])}",
+                    random.choice(PRIORITIES),
+                    start + timedelta(days=random.randrange(730)),
+                    random.random() < 0.3,
+                )
+                for i in range(min(SEED_BATCH, size - offset))
+            ],
+        )
+    return [todo.id for todo in backend.find(USER, fields=("done",))]
+
+
+def median_ms(run, repeat: int, setup=None) -> float:
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def render(limit: int) -> None:
+    console = Console(file=io.StringIO(), width=120)
+    display_table(console, list_pages(USER, sort=True, limit=limit))
+
+
+def render_plain(limit: int) -> None:
+    write_rows(io.StringIO(), list_pages(USER, sort=True, limit=limit), "plain")
+
+
+def cases(backend: SqliteBackend, ids: list[str]):
+    """(name, run, setup) triples; mutating cases take fresh ids on every run"""
+    fresh = cycle(random.sample(ids, len(ids)))
+    bulk = min(BULK, len(ids) // BULK_SHARE)
+
+    def take(count: int) -> list[str]:
+        return [next(fresh) for _ in range(count)]
+
+    def add():
+        for _ in range(OPS):
+            add_todo(USER, "benchmark", "medium", "2025-06-01")
+
+    def done():
+        for todo_id in take(OPS):
+            mark_as_done(USER, todo_id)
+
+    def reopen_low():
+        with backend.lock:
+            backend.connection.execute(
+                "UPDATE todos SET done = 0 WHERE user = ? AND priority = 'low'",
+                (USER,),
+            )
+
+    return [
+        (f"add_todo x{OPS}", add, None),
+        (f"mark_as_done x{OPS}", done, None),
+        (
+            "list sorted, first page",
+            lambda: list(list_todos(USER, True, limit=100)),
+            None,
+        ),
+        (
+            "list filtered, first page",
+            lambda: list(
+                list_todos(
+                    USER,
+                    True,
+                    query=make_filter("high", "open", None, None, "milk"),
+                    limit=100,
+                )
+            ),
+            None,
+        ),
+        (
+            "list sorted, every row",
+            lambda: sum(1 for _ in list_todos(USER, True)),
+            None,
+        ),
+        (
+            f"mark_all_as_done x{bulk}",
+            lambda: mark_all_as_done(USER, take(bulk)),
+            None,
+        ),
+        (f"delete_todos x{bulk}", lambda: delete_todos(USER, take(bulk)), None),
+        (
+            "mark_done_where priority",
+            lambda: mark_done_where(USER, make_filter("low", "open", None, None, None)),
+            reopen_low,
+        ),
+        (f"display_table {RENDERED} rows", lambda: render(RENDERED), None),
+        (f"plain output {RENDERED} rows", lambda: render_plain(RENDERED), None),
+    ]
+
+
+def run_size(size: int, repeat: int, directory: str) -> dict[str, float]:
+    path = os.path.join(directory, f"bench-{size}.db")
+    backend = SqliteBackend(path)
+    set_backend(backend)
+    try:
+        results = {}
+        start = time.perf_counter()
+        ids = seed(backend, size)
+        results["seed (add_many)"] = (time.perf_counter() - start) * 1000
+        for name, run, setup in cases(backend, ids):
+            results[name] = median_ms(run, repeat, setup)
+        return results
+    finally:
+        set_backend(None)
+        backend.close()
+        os.remove(path)
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for size, cases in results.items():
+        for name, ms in cases.items():
+            before = baseline.get(size, {}).get(name)
+            if (
+                before
+                and ms - before > MIN_DELTA_MS
+                and (ms - before) / before * 100 > threshold
+            ):
+                regressions.append(f"{size} {name}: {before:.1f} -> {ms:.1f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=SIZES,
+        help="comma separated todo counts (default: 1000,100000,1000000)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=25,
+        help="slowdown in percent that counts as a regression (default: 25)",
+    )
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            print(f"\n{size} todos")
+            results[str(size)] = run_size(size, args.repeat, directory)
+            for name, ms in results[str(size)].items():
+                print(f"  {name:<30} {ms:>10.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "results": {
+                        size: {name: round(ms, 2) for name, ms in cases.items()}
+                        for size, cases in results.items()
+                    },
+                },
+                f,
+                indent=2,
+            )
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Cold-start benchmark for every `todo` subcommand.
+
+Each case is run in a fresh interpreter with ``python -X importtime`` against a
+throwaway SQLite database, so the numbers cover interpreter start, imports,
+argument parsing and the command itself, without any network time.
+
+    python benchmarks/startup.py --runs 10 --json startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from todo.__main__ import create_arg_parser  # noqa: E402
+
+MISSING_ID = "000000000000000000000000"
+
+# Real invocations for subcommands that can run against an empty database.
+SAMPLE_ARGS = {
+    "add": ["add", "bench", "startup benchmark"],
+    "list": ["list", "bench"],
+    "done": ["done", "bench", MISSING_ID],
+    "delete": ["delete", "bench", MISSING_ID],
+}
+
+
+def subcommands() -> list[str]:
+    parser = create_arg_parser()
+    for action in parser._actions:
+        if isinstance(action, argparse._SubParsersAction):
+            return list(action.choices)
+    return []
+
+
+def cases() -> list[tuple[str, list[str]]]:
+    result = [("--help", ["--help"])]
+    for name in subcommands():
+        result.append((f"{name} --help", [name, "--help"]))
+        if name in SAMPLE_ARGS:
+            result.append((name, SAMPLE_ARGS[name]))
+    return result
+
+
+def parse_importtime(stderr: str) -> tuple[int, list[tuple[int, str]]]:
+    """Return total self import time and the top-level imports, in µs."""
+    total = 0
+    top_level = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        total += int(self_us)
+        if not name.startswith("  "):
+            top_level.append((int(cumulative_us), name.strip()))
+    return total, sorted(top_level, reverse=True)
+
+
+def run_case(argv: list[str], env: dict) -> tuple[float, int, list, int]:
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "todo", *argv],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    import_us, top_level = parse_importtime(process.stderr)
+    return wall_ms, import_us, top_level, process.returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="runs per case")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "TODO_BACKEND": "sqlite",
+            "TODO_SQLITE_PATH": os.path.join(tmp, "bench.db"),
+            "TODO_SECRETS": os.path.join(tmp, "missing.json"),
+        }
+        print(f"{'case':<20} {'wall ms':>9} {'import ms':>10}  heaviest import")
+        for name, argv in cases():
+            runs = [run_case(argv, env) for _ in range(args.runs)]
+            wall_ms = statistics.median(run[0] for run in runs)
+            import_ms = statistics.median(run[1] for run in runs) / 1000
+            heaviest = runs[-1][2][0][1] if runs[-1][2] else "-"
+            results.append(
+                {
+                    "case": name,
+                    "argv": argv,
+                    "wall_ms": round(wall_ms, 2),
+                    "import_ms": round(import_ms, 2),
+                    "heaviest_import": heaviest,
+                    "returncode": runs[-1][3],
+                }
+            )
+            print(f"{name:<20} {wall_ms:>9.1f} {import_ms:>10.1f}  {heaviest}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
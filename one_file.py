@@ -8,11 +8,14 @@ from rich.console import Console
 from rich.padding import Padding
 from bson.objectid import ObjectId, InvalidId
 from importlib.metadata import version
+from todo.src.model import FIELDS, Todo, projection, utcnow
+from todo.src.storage.mongo import to_document
+from todo.src.storage.mongo_client import client_from_config
 
 CONSOLE = Console()
 with open("secrets.json") as file:
     SECRETS = json.load(file)
-MONGO_CLIENT = pymongo.MongoClient(SECRETS["mongo_uri"])
+MONGO_CLIENT = client_from_config(SECRETS)
 MONGO_DATABASE = MONGO_CLIENT["todo"]
 
 
@@ -50,18 +53,14 @@ def display_todo_list(cursor) -> None:
 
     for todo in TODOS:
         TABLE.add_row(
-            format_datetime(todo["end_date"]),
-            todo["todo"],
-            todo["priority"],
-            (
-                "[bold green]Yes[/bold green]"
-                if todo["done"]
-                else "[bold red]No[/bold red]"
-            ),
-            str(todo["_id"]),
+            format_datetime(todo.end_date),
+            todo.todo,
+            todo.priority,
+            "[bold green]Yes[/bold green]" if todo.done else "[bold red]No[/bold red]",
+            todo.id,
         )
 
-    DONE_TODOS = sum(todo["done"] for todo in TODOS)
+    DONE_TODOS = sum(todo.done for todo in TODOS)
     NUM_RESULTS = len(TODOS)
     COMPLETION_PERCENTAGE = round(DONE_TODOS / NUM_RESULTS * 100) if NUM_RESULTS else 0
     TABLE.caption = (
@@ -97,12 +96,7 @@ def add_todo(
     user: str, todo: str, priority: str, end_date: datetime | None
 ) -> ObjectId:
     RESULT = MONGO_DATABASE[user.lower()].insert_one(
-        {
-            "todo": todo,
-            "priority": priority,
-            "end_date": end_date,
-            "done": False,
-        }
+        to_document(Todo(None, todo, priority, end_date, False))
     )
 
     return RESULT.inserted_id
@@ -119,7 +113,8 @@ def delete_todo(user: str, todo_id: ObjectId) -> int:
 def mark_as_done(user: str, todo_id: ObjectId) -> int:
     try:
         RESULT = MONGO_DATABASE[user.lower()].update_one(
-            {"_id": todo_id}, {"$set": {"done": True}}
+            {"_id": todo_id, "done": {"$ne": True}},
+            {"$set": {"done": True, "updated_at": utcnow()}},
         )
         return RESULT.modified_count
     except InvalidId:
@@ -128,12 +123,12 @@ def mark_as_done(user: str, todo_id: ObjectId) -> int:
 
 def list_todos(user: str, sort: bool = False, priority: str = None):
     QUERY = {"priority": priority} if priority else {}
-    CURSOR = MONGO_DATABASE[user.lower()].find(QUERY)
+    CURSOR = MONGO_DATABASE[user.lower()].find(QUERY, projection(FIELDS))
 
     if sort:
         CURSOR.sort("end_date", pymongo.ASCENDING)
 
-    return CURSOR
+    return map(Todo.from_document, CURSOR)
 
 
 def handle_action(ARGS):
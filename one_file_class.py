@@ -8,6 +8,9 @@ from rich.console import Console
 from rich.padding import Padding
 from bson.objectid import ObjectId, InvalidId
 from importlib.metadata import version
+from todo.src.model import FIELDS, Todo, projection, utcnow
+from todo.src.storage.mongo import to_document
+from todo.src.storage.mongo_client import client_from_config
 
 CONSOLE = Console()
 
@@ -46,18 +49,14 @@ def display_todo_list(cursor) -> None:
 
     for todo in TODOS:
         TABLE.add_row(
-            format_datetime(todo["end_date"]),
-            todo["todo"],
-            todo["priority"],
-            (
-                "[bold green]Yes[/bold green]"
-                if todo["done"]
-                else "[bold red]No[/bold red]"
-            ),
-            str(todo["_id"]),
+            format_datetime(todo.end_date),
+            todo.todo,
+            todo.priority,
+            "[bold green]Yes[/bold green]" if todo.done else "[bold red]No[/bold red]",
+            todo.id,
         )
 
-    DONE_TODOS = sum(todo["done"] for todo in TODOS)
+    DONE_TODOS = sum(todo.done for todo in TODOS)
     NUM_RESULTS = len(TODOS)
     COMPLETION_PERCENTAGE = round(DONE_TODOS / NUM_RESULTS * 100) if NUM_RESULTS else 0
     TABLE.caption = (
@@ -89,7 +88,7 @@ class TodoApp:
     def __init__(self, user: str = "default", secrets_file="secrets.json"):
         with open(secrets_file) as file:
             secrets = json.load(file)
-        self.client = pymongo.MongoClient(secrets["mongo_uri"])
+        self.client = client_from_config(secrets)
         self.db = self.client["todo"]
         self.collection = self.db[user.lower()]
 
@@ -99,7 +98,7 @@ class TodoApp:
             raise ValueError("Invalid date format. Please use YYYY-MM-DD")
 
         result = self.collection.insert_one(
-            {"todo": todo, "priority": priority, "end_date": end_date, "done": False}
+            to_document(Todo(None, todo, priority, end_date, False))
         )
         return result.inserted_id
 
@@ -108,20 +107,25 @@ class TodoApp:
         return result.deleted_count
 
     def done(self, id: ObjectId):
-        result = self.collection.update_one({"_id": id}, {"$set": {"done": True}})
+        result = self.collection.update_one(
+            {"_id": id, "done": {"$ne": True}},
+            {"$set": {"done": True, "updated_at": utcnow()}},
+        )
         return result.modified_count
 
-    def list(self, sort: bool = False, priority: str = None, done: bool = None):
+    def list(
+        self, sort: bool = False, priority: str = None, done: bool = None
+    ) -> list[Todo]:
         query = {}
         if priority:
             query["priority"] = priority
         if done is not None:
             query["done"] = done
-        cursor = self.collection.find(query)
+        cursor = self.collection.find(query, projection(FIELDS))
         if sort:
             cursor.sort("end_date", pymongo.ASCENDING)
 
-        return list(cursor)
+        return [Todo.from_document(document) for document in cursor]
 
 
 def main():
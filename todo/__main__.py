@@ -1,26 +1,62 @@
 import argparse
-from rich.console import Console
-from importlib.metadata import version
-from todo.src.app import display_error, display_success
-from todo.src.app import app
+import os
+import time
 
 
 def main():
-    console = Console()
-
+    started = time.perf_counter()
     parser = create_arg_parser()
 
     args = parser.parse_args()
+    args.profile = args.profile or os.environ.get("TODO_PROFILE", "") not in ("", "0")
+    args.profile_dump = args.profile_dump or os.environ.get("TODO_PROFILE_DUMP")
+    args.started = started
+
+    # rich and the storage layer are only imported once there is a command to
+    # run, so --help and argument errors never pay for them, and not at all
+    # when a running daemon answers the command.
+    from todo.client import forward
+
+    if not args.version and forward(args):
+        return
+
+    from rich.console import Console
+    from todo.src.app import app, display_error
+
+    console = Console()
 
     try:
         if args.version:
             display_version(console)
-        elif args.action in ["add", "delete", "list", "done"]:
+        elif args.action in [
+            "add",
+            "delete",
+            "list",
+            "done",
+            "stats",
+            "due",
+            "next",
+            "watch",
+            "archive",
+            "import",
+            "export",
+            "admin",
+            "sync",
+            "daemon",
+            "shell",
+        ]:
             app(console, args)
         else:
             console.print(parser.format_help())
     except argparse.ArgumentError as e:
-        display_error(str(e))
+        display_error(console, str(e))
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
 
 
 def create_arg_parser():
@@ -28,6 +64,16 @@ def create_arg_parser():
     parser.add_argument(
         "-v", "--version", help="show the version of todo", action="store_true"
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print where the command spent its time (or set TODO_PROFILE=1)",
+    )
+    parser.add_argument(
+        "--profile-dump",
+        metavar="FILE",
+        help="also write cProfile stats to FILE (or set TODO_PROFILE_DUMP)",
+    )
 
     sub_parsers = parser.add_subparsers(dest="action")
 
@@ -51,7 +97,18 @@ def create_arg_parser():
         "delete", help="delete a todo item from the list"
     )
     delete_parser.add_argument("user", metavar="user", help="the user to log in as")
-    delete_parser.add_argument("todo_id", type=str, help="the id of the todo to delete")
+    delete_parser.add_argument(
+        "todo_ids",
+        nargs="*",
+        metavar="todo_id",
+        help="the ids of the todos to delete (- reads them from stdin)",
+    )
+    add_filter_arguments(delete_parser, "delete")
+    delete_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="only count the todos matching the filters (not with todo ids)",
+    )
 
     # List subparsers
     list_parser = sub_parsers.add_parser("list", help="list all todos for a user")
@@ -59,24 +116,286 @@ def create_arg_parser():
     list_parser.add_argument(
         "--sort", action="store_true", help="sort todos by end date"
     )
+    add_filter_arguments(list_parser, "list")
+    list_parser.add_argument(
+        "--limit", type=positive_int, help="list at most this many todos"
+    )
+    list_parser.add_argument(
+        "--page-size",
+        type=positive_int,
+        default=100,
+        help="how many todos to fetch and render at once (default: 100)",
+    )
+    list_parser.add_argument(
+        "--after",
+        metavar="END_DATE,ID",
+        help="resume a sorted listing after this todo (implies --sort)",
+    )
+    list_parser.add_argument(
+        "--output",
+        choices=["table", "plain", "tsv", "json"],
+        help="how to print the todos; plain, tsv and json (one object per line) "
+        "write each row as it arrives (default: table on a terminal, plain "
+        "otherwise)",
+    )
     list_parser.add_argument(
+        "--include-archived",
+        action="store_true",
+        help="list archived todos too",
+    )
+    list_parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="print the query plan instead of the todos",
+    )
+
+    # Due subparsers
+    due_parser = sub_parsers.add_parser(
+        "due", help="agenda of open todos by end date (overdue and upcoming)"
+    )
+    due_parser.add_argument("user", metavar="user", help="the user to log in as")
+    due_parser.add_argument(
+        "--within",
+        metavar="DURATION",
+        help="show todos ending from today to this far ahead, e.g. 7d or 2w",
+    )
+    due_parser.add_argument(
+        "--overdue", action="store_true", help="show todos ending before today"
+    )
+    due_parser.add_argument(
         "-p",
         "--priority",
         choices=["low", "medium", "high"],
-        help="filter todos by priority",
+        help="only show todos with this priority",
+    )
+    due_parser.add_argument(
+        "--per-day",
+        type=positive_int,
+        default=10,
+        help="show at most this many todos per day (default: 10)",
+    )
+
+    # Next subparsers
+    next_parser = sub_parsers.add_parser(
+        "next", help="the most urgent open todos (highest priority, then due first)"
+    )
+    next_parser.add_argument("user", metavar="user", help="the user to log in as")
+    next_parser.add_argument(
+        "-n",
+        dest="count",
+        type=positive_int,
+        default=5,
+        help="how many todos to show (default: 5)",
+    )
+    next_parser.add_argument(
+        "--output",
+        choices=["table", "plain", "tsv", "json"],
+        help="how to print the todos, like list (default: table on a terminal, "
+        "plain otherwise)",
+    )
+
+    # Watch subparsers
+    watch_parser = sub_parsers.add_parser(
+        "watch", help="keep the list on screen, updated as todos change"
+    )
+    watch_parser.add_argument("user", metavar="user", help="the user to log in as")
+    watch_parser.add_argument(
+        "--interval",
+        type=float,
+        default=2.0,
+        help="seconds between polls when the backend has no change stream "
+        "(default: 2)",
+    )
+    watch_parser.add_argument(
+        "--limit",
+        type=positive_int,
+        default=100,
+        help="show at most this many todos, sorted by end date (default: 100)",
     )
 
     # Done subparsers
     done_parser = sub_parsers.add_parser("done", help="mark a todo as done")
     done_parser.add_argument("user", metavar="user", help="the user to log in as")
     done_parser.add_argument(
-        "todo_id", type=str, help="the id of the todo to mark as done"
+        "todo_ids",
+        nargs="*",
+        metavar="todo_id",
+        help="the ids of the todos to mark as done (- reads them from stdin)",
+    )
+    add_filter_arguments(done_parser, "mark as done")
+    done_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="only count the todos matching the filters (not with todo ids)",
+    )
+
+    # Stats subparsers
+    stats_parser = sub_parsers.add_parser("stats", help="summarize a user's todos")
+    stats_parser.add_argument("user", metavar="user", help="the user to log in as")
+    add_filter_arguments(stats_parser, "count")
+
+    # Import subparsers
+    import_parser = sub_parsers.add_parser(
+        "import", help="import todos from a CSV or JSONL file"
+    )
+    import_parser.add_argument("user", metavar="user", help="the user to log in as")
+    import_parser.add_argument(
+        "file", help="the file to import (columns: todo, priority, end_date, done)"
+    )
+    import_parser.add_argument(
+        "--format",
+        choices=["csv", "jsonl"],
+        help="the file format (default: guessed from the extension)",
+    )
+    import_parser.add_argument(
+        "--batch-size",
+        type=positive_int,
+        default=1000,
+        help="how many rows to validate and write at once (default: 1000)",
+    )
+
+    # Archive subparsers
+    archive_parser = sub_parsers.add_parser(
+        "archive", help="move old done todos out of the working set"
+    )
+    archive_parser.add_argument("user", metavar="user", help="the user to log in as")
+    archive_parser.add_argument(
+        "--older-than",
+        metavar="DURATION",
+        help="archive todos done more than this long ago, e.g. 30d or 4w "
+        "(default: archive.older_than in secrets.json, else 30d)",
+    )
+    archive_parser.add_argument(
+        "--batch-size",
+        type=positive_int,
+        default=1000,
+        help="how many todos to move at once (default: 1000)",
+    )
+
+    # Export subparsers
+    export_parser = sub_parsers.add_parser(
+        "export", help="export todos to a JSONL or CSV file"
+    )
+    export_parser.add_argument("user", metavar="user", help="the user to log in as")
+    export_parser.add_argument(
+        "--format",
+        choices=["jsonl", "csv"],
+        default="jsonl",
+        help="the file format (default: jsonl)",
+    )
+    export_parser.add_argument(
+        "-o", "--output", metavar="FILE", help="the file to write (default: stdout)"
+    )
+    export_parser.add_argument(
+        "--batch-size",
+        type=positive_int,
+        default=1000,
+        help="how many todos to read at once (default: 1000)",
+    )
+    export_parser.add_argument(
+        "--since",
+        help="only export todos added or changed since this ISO date or time (UTC)",
+    )
+    export_parser.add_argument(
+        "--include-archived",
+        action="store_true",
+        help="export archived todos too (needed for a full backup)",
+    )
+
+    # Admin subparsers
+    admin_parser = sub_parsers.add_parser("admin", help="maintenance commands")
+    admin_sub_parsers = admin_parser.add_subparsers(dest="admin_action", required=True)
+    ensure_indexes_parser = admin_sub_parsers.add_parser(
+        "ensure-indexes", help="create the indexes used by listings"
+    )
+    ensure_indexes_parser.add_argument(
+        "users", nargs="*", help="the users to index (default: every user)"
+    )
+    backfill_parser = admin_sub_parsers.add_parser(
+        "backfill-ranks", help="store the priority rank of todos added before it"
+    )
+    backfill_parser.add_argument(
+        "users", nargs="*", help="the users to backfill (default: every user)"
+    )
+    report_parser = admin_sub_parsers.add_parser(
+        "report", help="open, done and overdue counts for every user"
+    )
+    report_parser.add_argument(
+        "users", nargs="*", help="the users to report on (default: every user)"
+    )
+    report_parser.add_argument(
+        "--workers",
+        type=positive_int,
+        default=8,
+        help="how many users to aggregate at once (default: 8)",
+    )
+    migrate_parser = admin_sub_parsers.add_parser(
+        "migrate-layout",
+        help="copy the per-user mongo collections into one shared collection",
+    )
+    migrate_parser.add_argument(
+        "--batch-size",
+        type=positive_int,
+        default=1000,
+        help="how many todos to copy at once (default: 1000)",
+    )
+
+    # Sync subparser
+    sync_parser = sub_parsers.add_parser(
+        "sync", help="replay journaled writes to the backend"
+    )
+    sync_parser.add_argument(
+        "--background", action="store_true", help=argparse.SUPPRESS
+    )
+
+    # Shell subparser
+    shell_parser = sub_parsers.add_parser(
+        "shell", help="run commands for a user in an interactive shell"
+    )
+    shell_parser.add_argument("user", metavar="user", help="the user to log in as")
+
+    # Daemon subparser
+    daemon_parser = sub_parsers.add_parser(
+        "daemon", help="serve commands from a warm process over a Unix socket"
+    )
+    daemon_parser.add_argument(
+        "--socket",
+        help="the socket to listen on (default: $TODO_SOCKET or "
+        "~/.cache/todo/daemon.sock)",
     )
 
     return parser
 
 
+def add_filter_arguments(parser, verb: str):
+    parser.add_argument(
+        "-p",
+        "--priority",
+        choices=["low", "medium", "high"],
+        help=f"only {verb} todos with this priority",
+    )
+    parser.add_argument(
+        "--status",
+        choices=["done", "open"],
+        help=f"only {verb} done or open todos",
+    )
+    parser.add_argument(
+        "--from",
+        dest="from_date",
+        help=f"only {verb} todos ending on or after (YYYY-MM-DD)",
+    )
+    parser.add_argument(
+        "--before", help=f"only {verb} todos ending before (YYYY-MM-DD)"
+    )
+    parser.add_argument(
+        "--text", help=f"only {verb} todos containing this text (case-insensitive)"
+    )
+
+
 def display_version(console):
+    from importlib.metadata import version
+    from todo.src.app import display_success
+
     todo_version = version("todo")
     display_success(console, f"Current version: {todo_version}")
 
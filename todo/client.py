@@ -0,0 +1,57 @@
+import json
+import os
+import shutil
+import socket
+import sys
+
+DEFAULT_SOCKET = os.path.join(os.path.expanduser("~"), ".cache", "todo", "daemon.sock")
+
+# Commands a running daemon can answer. Imports and syncs are long running and
+# work on local files, they always run in the calling process.
+FORWARDED = ["add", "delete", "list", "done", "stats", "due", "next", "admin"]
+
+
+# What picks the database; the daemon only answers clients that agree with it
+CONFIG_ENV = ["TODO_SECRETS", "TODO_BACKEND", "TODO_SQLITE_PATH"]
+ACCEPTED = "ok\n"
+
+
+def socket_path() -> str:
+    return os.environ.get("TODO_SOCKET") or DEFAULT_SOCKET
+
+
+def forward(args, path: str = None) -> bool:
+    """Run the command on the daemon, False when it has to run in process.
+
+    Only the standard library is imported here so that a forwarded command
+    never pays for rich or the storage layer. The daemon refuses commands
+    whose working directory and environment point at another database.
+    """
+    if args.action not in FORWARDED or "-" in (getattr(args, "todo_ids", None) or []):
+        return False
+    if getattr(args, "profile", False):
+        # The profile has to measure this process, not the daemon
+        return False
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path or socket_path())
+    except OSError:
+        client.close()
+        return False
+
+    request = {
+        "args": vars(args),
+        "cwd": os.getcwd(),
+        "env": {name: os.environ[name] for name in CONFIG_ENV if name in os.environ},
+        "width": shutil.get_terminal_size().columns,
+        "color": sys.stdout.isatty(),
+    }
+    with client, client.makefile("r", encoding="utf-8") as response:
+        client.sendall(json.dumps(request).encode() + b"\n")
+        if response.readline() != ACCEPTED:
+            return False
+        for line in response:
+            sys.stdout.write(line)
+    sys.stdout.flush()
+    return True
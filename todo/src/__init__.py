@@ -5,8 +5,24 @@ from .app import display_success
 from .app import validate_date
 from .app import add_todo
 from .app import delete_todo
+from .app import delete_todos
+from .app import delete_where
 from .app import list_todos
+from .app import count_todos
+from .app import todo_stats
+from .app import due_filter
+from .app import todo_agenda
+from .app import next_todos
+from .app import backfill_ranks
+from .app import archive_todos
+from .app import count_archived
+from .app import make_filter
+from .app import explain_todos
+from .app import ensure_indexes
+from .app import user_report
 from .app import mark_as_done
+from .app import mark_all_as_done
+from .app import mark_done_where
 
 __all__ = [
     "app",
@@ -16,6 +32,32 @@ __all__ = [
     "validate_date",
     "add_todo",
     "delete_todo",
+    "delete_todos",
+    "delete_where",
     "list_todos",
+    "count_todos",
+    "todo_stats",
+    "due_filter",
+    "todo_agenda",
+    "next_todos",
+    "backfill_ranks",
+    "archive_todos",
+    "count_archived",
+    "make_filter",
+    "explain_todos",
+    "ensure_indexes",
+    "user_report",
     "mark_as_done",
+    "mark_all_as_done",
+    "mark_done_where",
+    "AsyncTodoApp",
 ]
+
+
+def __getattr__(name: str):
+    # asyncio is slow to import, so the async API is only loaded when used
+    if name == "AsyncTodoApp":
+        from .async_app import AsyncTodoApp
+
+        return AsyncTodoApp
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
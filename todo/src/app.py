@@ -1,28 +1,39 @@
-import json
-import pymongo
-from rich import box
+import hashlib
+import heapq
+import os
+import sys
+import time
+from dataclasses import replace
+from itertools import chain, islice
+from typing import Callable, Iterable, Iterator
 from rich.padding import Padding
-from bson.objectid import ObjectId
-from rich.table import Table
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
-
-with open("secrets.json") as f:
-    secrets = json.load(f)
-mongo_client = pymongo.MongoClient(secrets["mongo_uri"])
-mongo_database = mongo_client["todo"]
+from todo.src.config import load_config
+from todo.src.model import ALL_FIELDS, FIELDS, Todo, sort_key, utcnow
+from todo.src.storage import AgendaDay, TodoFilter, get_backend
 
 
 def drop_user_collection(user: str):
-    mongo_database[user.lower()].drop()
+    get_backend().drop_user(user.lower())
 
 
-def validate_date(date_str: str) -> bool:
+DATE_FORMAT_ERROR = "Invalid date format. Please use YYYY-MM-DD"
+
+
+def parse_date(date_str: str) -> datetime:
+    """Parse a YYYY-MM-DD date, raising ValueError for anything else"""
+    if len(date_str) != 10 or date_str[4] != "-" or date_str[7] != "-":
+        raise ValueError(DATE_FORMAT_ERROR)
     try:
-        datetime.strptime(date_str, "%Y-%m-%d")
-        return True
+        return datetime.fromisoformat(date_str)
     except ValueError:
-        return False
+        raise ValueError(DATE_FORMAT_ERROR)
+
+
+def validate_date(date_str: str) -> bool:
+    parse_date(date_str)
+    return True
 
 
 def format_datetime(dt: datetime) -> str:
@@ -30,22 +41,18 @@ def format_datetime(dt: datetime) -> str:
     return dt.strftime("%Y-%m-%d") if dt else None
 
 
+def new_todo(
+    todo: str, priority: str, end_date: datetime = None, done: bool = False
+) -> Todo:
+    return Todo(None, todo, priority, end_date, done)
+
+
 def add_todo(user: str, todo: str, priority: str, end_date: str = None) -> str:
     try:
-        if end_date is not None and not validate_date(end_date):
-            raise ValueError("Invalid date format. Please use YYYY-MM-DD")
-
-        result = mongo_database[user.lower()].insert_one(
-            {
-                "todo": todo,
-                "priority": priority,
-                "end_date": (
-                    datetime.strptime(end_date, "%Y-%m-%d") if end_date else None
-                ),
-                "done": False,
-            }
+        return get_backend().add(
+            user.lower(),
+            new_todo(todo, priority, parse_date(end_date) if end_date else None),
         )
-        return str(result.inserted_id)
     except ValueError as ve:
         raise ValueError(str(ve))
     except Exception as e:
@@ -54,35 +61,385 @@ def add_todo(user: str, todo: str, priority: str, end_date: str = None) -> str:
 
 def delete_todo(user: str, todo_id: str) -> int:
     try:
-        result = mongo_database[user.lower()].delete_one({"_id": ObjectId(todo_id)})
-        return result.deleted_count
+        return get_backend().delete(user.lower(), todo_id)
     except Exception as e:
         raise Exception(f"Failed to delete todo: {str(e)}")
 
 
-def list_todos(user: str, sort: bool = False, priority: str = None):
+def delete_todos(user: str, todo_ids: list[str]) -> tuple[list[str], list[str]]:
+    """Delete several todos at once, returning the matched and unmatched ids"""
     try:
-        query = {"priority": priority} if priority else {}
-        cursor = mongo_database[user.lower()].find(query)
+        deleted = get_backend().delete_many(user.lower(), todo_ids)
+        return deleted, unmatched_ids(todo_ids, deleted)
+    except Exception as e:
+        raise Exception(f"Failed to delete todos: {str(e)}")
 
-        if sort:
-            cursor = cursor.sort("end_date", pymongo.ASCENDING)
 
-        return cursor
+def delete_where(user: str, query: TodoFilter) -> int:
+    try:
+        return get_backend().delete_where(user.lower(), query)
+    except Exception as e:
+        raise Exception(f"Failed to delete todos: {str(e)}")
+
+
+def make_filter(
+    priority: str = None,
+    status: str = None,
+    after: str = None,
+    before: str = None,
+    text: str = None,
+) -> TodoFilter:
+    """Build a TodoFilter from command line style values"""
+    return TodoFilter(
+        priority=priority,
+        done={"done": True, "open": False}.get(status),
+        after=parse_date(after) if after else None,
+        before=parse_date(before) if before else None,
+        text=text or None,
+    )
+
+
+def list_todos(
+    user: str,
+    sort: bool = False,
+    priority: str = None,
+    query: TodoFilter = None,
+    limit: int = None,
+    after: tuple = None,
+    fields: tuple = None,
+    include_archived: bool = False,
+) -> Iterable[Todo]:
+    """List todos, with ``include_archived`` the archived ones too.
+
+    Both stores are queried with the same filter, cursor and limit, and
+    sorted listings are merged in order, so keyset paging still works.
+    """
+    try:
+        query = query or TodoFilter()
+        if priority:
+            query = replace(query, priority=priority)
+        backend = get_backend()
+        todos = backend.find(user.lower(), query, sort, limit, after, fields)
+        if not include_archived:
+            return todos
+
+        archived = backend.find_archived(
+            user.lower(), query, sort, limit, after, fields
+        )
+        if sort or after:
+            todos = heapq.merge(todos, archived, key=sort_key)
+        else:
+            todos = chain(todos, archived)
+        return islice(todos, limit) if limit else todos
     except Exception as e:
         raise Exception(f"Failed to list todos: {str(e)}")
 
 
+def list_pages(
+    user: str,
+    sort: bool = False,
+    query: TodoFilter = None,
+    page_size: int = 100,
+    limit: int = None,
+    after: tuple = None,
+    fields: tuple = FIELDS,
+    include_archived: bool = False,
+) -> Iterator[list[Todo]]:
+    """Yield todos one page at a time.
+
+    Sorted listings fetch every page with its own keyset query on
+    (end_date, _id), so only one page is ever held in memory. Unsorted ones
+    stream a single cursor in page sized chunks.
+    """
+    if not (sort or after):
+        todos = list_todos(
+            user,
+            query=query,
+            limit=limit,
+            fields=fields,
+            include_archived=include_archived,
+        )
+        yield from batched(todos, page_size)
+        return
+
+    fields = tuple({*fields, "end_date"})
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = page_size if remaining is None else min(page_size, remaining)
+        page = list(
+            list_todos(
+                user,
+                True,
+                query=query,
+                limit=size,
+                after=after,
+                fields=fields,
+                include_archived=include_archived,
+            )
+        )
+        if page:
+            yield page
+        if len(page) < size:
+            return
+        after = (page[-1].end_date, page[-1].id)
+        if remaining is not None:
+            remaining -= len(page)
+
+
+def format_cursor(todo: Todo) -> str:
+    return f"{format_datetime(todo.end_date) or ''},{todo.id}"
+
+
+def parse_cursor(cursor: str) -> tuple:
+    """Parse an "end_date,_id" keyset cursor (the end date may be empty)"""
+    end_date, separator, todo_id = cursor.partition(",")
+    if not separator or not todo_id:
+        raise ValueError("Invalid cursor. Please use END_DATE,ID")
+    return (parse_date(end_date) if end_date else None, todo_id)
+
+
+def batched(rows: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def explain_todos(user: str, sort: bool = False, query: TodoFilter = None) -> dict:
+    try:
+        return get_backend().explain(user.lower(), query or TodoFilter(), sort)
+    except Exception as e:
+        raise Exception(f"Failed to explain todos query: {str(e)}")
+
+
+DURATION_UNITS = {"d": 1, "w": 7}
+
+
+def parse_duration(value: str) -> timedelta:
+    """Parse a number of days or weeks, such as 7d or 2w"""
+    number, unit = value[:-1], value[-1:].lower()
+    if unit not in DURATION_UNITS or not number.isdigit():
+        raise ValueError(f"Invalid duration: {value} (use days or weeks, e.g. 7d, 2w)")
+    return timedelta(days=int(number) * DURATION_UNITS[unit])
+
+
+def today_start() -> datetime:
+    return datetime.combine(date.today(), datetime.min.time())
+
+
+def due_filter(
+    overdue: bool = False,
+    within: str = None,
+    priority: str = None,
+    today: datetime = None,
+) -> TodoFilter:
+    """Filter for open todos that are overdue and/or due ``within`` from today.
+
+    ``within`` includes both today and its last day. Neither flag means both,
+    within a week. Each is a range on end_date with done false, which the
+    done_end_date indexes serve directly.
+    """
+    today = today or today_start()
+    horizon = today + parse_duration(within or "7d") + timedelta(days=1)
+    if overdue and not within:
+        return TodoFilter(priority=priority, done=False, before=today)
+    return TodoFilter(
+        priority=priority,
+        done=False,
+        after=today if within and not overdue else None,
+        before=horizon,
+    )
+
+
+def next_todos(user: str, count: int = 5, fields: tuple = FIELDS) -> list[Todo]:
+    """The ``count`` most urgent open todos: highest priority, then due first"""
+    try:
+        return list(get_backend().most_urgent(user.lower(), count, fields))
+    except Exception as e:
+        raise Exception(f"Failed to list the next todos: {str(e)}")
+
+
+def todo_agenda(user: str, query: TodoFilter, per_day: int = 10) -> list[AgendaDay]:
+    """Todos grouped by end date server-side, at most ``per_day`` per day"""
+    try:
+        return get_backend().agenda(user.lower(), query, per_day)
+    except Exception as e:
+        raise Exception(f"Failed to build the agenda: {str(e)}")
+
+
+# Auto-archive runs are stamped here, one file per user
+ARCHIVE_STAMPS = os.path.join("~", ".cache", "todo", "archived")
+
+
+def count_archived(user: str, query: TodoFilter = None) -> int:
+    try:
+        return get_backend().count_archived(user.lower(), query or TodoFilter())
+    except Exception as e:
+        raise Exception(f"Failed to count archived todos: {str(e)}")
+
+
+def archive_todos(
+    user: str,
+    older_than: str = "30d",
+    batch_size: int = 1000,
+    on_batch: Callable[[int], None] = None,
+) -> int:
+    """Move the todos done more than ``older_than`` ago (e.g. 30d) to the archive"""
+    try:
+        if batch_size < 1:
+            raise ValueError(f"Invalid batch size: {batch_size} (must be at least 1)")
+        before = utcnow() - parse_duration(older_than)
+        return get_backend().archive(user.lower(), before, batch_size, on_batch)
+    except ValueError as ve:
+        raise ValueError(str(ve))
+    except Exception as e:
+        raise Exception(f"Failed to archive todos: {str(e)}")
+
+
+def archive_settings() -> dict:
+    return load_config().get("archive") or {}
+
+
+def auto_archive(user: str) -> int:
+    """Run the "archive" policy if it is on and did not run for ``user`` today.
+
+    The last run is the modification time of a stamp file per user, so the
+    check costs a stat rather than a query. Stamps are named by a hash of the
+    user, which may hold any character. A stamp that cannot be written only
+    means the policy runs again next time.
+    """
+    settings = archive_settings()
+    if not settings.get("auto"):
+        return 0
+    stamps = os.path.expanduser(settings.get("stamps", ARCHIVE_STAMPS))
+    stamp = os.path.join(stamps, hashlib.sha256(user.encode()).hexdigest())
+    if os.path.exists(stamp) and time.time() - os.path.getmtime(stamp) < 86400:
+        return 0
+
+    archived = archive_todos(
+        user, settings.get("older_than", "30d"), settings.get("batch_size", 1000)
+    )
+    try:
+        os.makedirs(stamps, exist_ok=True)
+        with open(stamp, "w"):
+            pass
+    except OSError:
+        pass
+    return archived
+
+
+def todo_stats(user: str, query: TodoFilter = None) -> dict:
+    """Count total, done, open, overdue and per priority todos server-side"""
+    try:
+        today = today_start()
+        return get_backend().stats(user.lower(), query or TodoFilter(), today)
+    except Exception as e:
+        raise Exception(f"Failed to compute todo stats: {str(e)}")
+
+
+def ensure_indexes(users: list[str] = None) -> dict[str, list[str]]:
+    """Create the listing indexes for the given users (default: every user)"""
+    try:
+        backend = get_backend()
+        users = [user.lower() for user in users] if users else backend.list_users()
+        return {user: backend.ensure_indexes(user) for user in users}
+    except Exception as e:
+        raise Exception(f"Failed to create indexes: {str(e)}")
+
+
+def backfill_ranks(users: list[str] = None) -> dict[str, int]:
+    """Store the priority rank of older todos (default: every user)"""
+    try:
+        backend = get_backend()
+        users = [user.lower() for user in users] if users else backend.list_users()
+        return {user: backend.backfill_ranks(user) for user in users}
+    except Exception as e:
+        raise Exception(f"Failed to backfill priority ranks: {str(e)}")
+
+
+def user_report(users: list[str] = None, workers: int = 8) -> dict[str, dict]:
+    """Stats for the given users (default: every user), computed concurrently.
+
+    Each user's aggregation runs on a pool of ``workers`` threads, so the
+    report takes about as long as the slowest users rather than all of them.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    try:
+        backend = get_backend()
+        users = [user.lower() for user in users] if users else backend.list_users()
+        today = today_start()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            stats = executor.map(
+                lambda user: backend.stats(user, TodoFilter(), today), users
+            )
+            return dict(zip(users, stats))
+    except Exception as e:
+        raise Exception(f"Failed to build the report: {str(e)}")
+
+
+def migrate_layout(
+    batch_size: int = 1000, on_batch: Callable[[str, int], None] = None
+) -> dict[str, int]:
+    """Copy the per-user mongo collections into the shared layout"""
+    from todo.src.storage.mongo import migrate_to_shared
+
+    backend = get_backend()
+    if not hasattr(backend, "database"):
+        raise ValueError("Storage layouts only apply to the mongo backend")
+    try:
+        return migrate_to_shared(backend.database, batch_size, on_batch)
+    except Exception as e:
+        raise Exception(f"Failed to migrate the layout: {str(e)}")
+
+
+def count_todos(user: str, query: TodoFilter = None) -> int:
+    try:
+        return get_backend().count(user.lower(), query or TodoFilter())
+    except Exception as e:
+        raise Exception(f"Failed to count todos: {str(e)}")
+
+
 def mark_as_done(user: str, todo_id: str) -> int:
     try:
-        result = mongo_database[user.lower()].update_one(
-            {"_id": ObjectId(todo_id)}, {"$set": {"done": True}}
-        )
-        return result.modified_count
+        return get_backend().mark_done(user.lower(), todo_id)
     except Exception as e:
         raise Exception(f"Failed to mark todo as done: {str(e)}")
 
 
+def mark_all_as_done(user: str, todo_ids: list[str]) -> tuple[list[str], list[str]]:
+    """Mark several todos as done at once, returning the matched and unmatched ids"""
+    try:
+        done = get_backend().mark_done_many(user.lower(), todo_ids)
+        return done, unmatched_ids(todo_ids, done)
+    except Exception as e:
+        raise Exception(f"Failed to mark todos as done: {str(e)}")
+
+
+def mark_done_where(user: str, query: TodoFilter) -> int:
+    try:
+        return get_backend().mark_done_where(user.lower(), query)
+    except Exception as e:
+        raise Exception(f"Failed to mark todos as done: {str(e)}")
+
+
+def unmatched_ids(todo_ids: list[str], matched: list[str]) -> list[str]:
+    matched = set(matched)
+    return [todo_id for todo_id in todo_ids if todo_id.lower() not in matched]
+
+
+def read_todo_ids(todo_ids: list[str]) -> list[str]:
+    """Expand "-" into the ids read from stdin and drop duplicates"""
+    ids = []
+    for todo_id in todo_ids:
+        ids += sys.stdin.read().split() if todo_id == "-" else [todo_id]
+    return list(dict.fromkeys(ids))
+
+
 def display_error(console, message: str = "An error occurred", id: str = None):
     message = (
         f"[bold red][ERROR][/bold red] {message} [black](id: {id})[black]"
@@ -103,72 +460,539 @@ def display_success(console, message: str = "Operation successful", id: str = No
     console.print(Padding(message, (1, 0, 1, 0)))
 
 
-def display_table(console, results):
-    results = list(results)
+def display_matches(console, message: str, matched: list[str], missing: list[str]):
+    if matched:
+        subject = "Todo" if len(matched) == 1 else f"{len(matched)} todos"
+        display_success(console, f"{subject} {message}", ", ".join(matched))
+    if missing:
+        subject = "Todo" if len(missing) == 1 else f"{len(missing)} todos"
+        display_error(console, f"{subject} not found", ", ".join(missing))
+
 
+def new_table(show_header: bool = True):
+    from rich import box
+    from rich.table import Table
+
+    # Every page is printed as its own table, so all columns but "Todo" get a
+    # fixed width to keep the pages aligned.
     table = Table(
         min_width=75,
+        expand=True,
         row_styles=["none"],
         border_style="cyan",
         header_style="bold yellow",
         footer_style="bold black",
         box=box.SIMPLE,
-        show_footer=True,
+        show_header=show_header,
+        show_edge=show_header,
     )
-    table.add_column("End Date")
-    table.add_column("Todo")
-    table.add_column("Priority")
-    table.add_column("Done")
-    table.add_column("ID")
+    table.add_column("End Date", width=10, no_wrap=True)
+    table.add_column("Todo", ratio=1)
+    table.add_column("Priority", width=8, no_wrap=True)
+    table.add_column("Done", width=4, no_wrap=True)
+    table.add_column("ID", width=24, no_wrap=True)
+    return table
 
-    for todo in results:
+
+def add_rows(table, todos: Iterable[Todo]) -> None:
+    for todo in todos:
         table.add_row(
-            format_datetime(todo["end_date"]),
-            todo["todo"],
-            todo["priority"],
-            (
-                "[bold green]Yes[/bold green]"
-                if todo["done"]
-                else "[bold red]No[/bold red]"
-            ),
-            str(todo["_id"]),
+            format_datetime(todo.end_date),
+            todo.todo,
+            todo.priority,
+            "[bold green]Yes[/bold green]" if todo.done else "[bold red]No[/bold red]",
+            todo.id,
+        )
+
+
+def display_table(console, pages: Iterable[list[Todo]]) -> Todo:
+    """Render todos, printing every page as soon as it arrives.
+
+    Returns the last todo rendered (None if there was none).
+    """
+    table = todo = None
+    num_results = 0
+
+    for page in pages:
+        table = new_table(show_header=table is None)
+        add_rows(table, page)
+        num_results += len(page)
+        if page:
+            todo = page[-1]
+        # Later pages drop the edges (and the blank lines they add), so pad
+        # them by the edge width to stay aligned with the first page.
+        console.print(
+            table if num_results == len(page) else Padding(table, (0, 1, 0, 1))
         )
 
-    done_todos = sum(1 for todo in results if todo["done"])
-    num_results = len(results)
+    if table is None:
+        console.print(new_table())
+
+    return todo
+
+
+def completion_caption(stats: dict) -> str:
+    done_todos, num_results = stats["done"], stats["total"]
     completion_percentage = round(done_todos / num_results * 100) if num_results else 0
-    table.caption = (
-        f"{completion_percentage} % Completed ( {done_todos} / {num_results} )"
+    return f"{completion_percentage} % Completed ( {done_todos} / {num_results} )"
+
+
+def display_agenda(console, days: list[AgendaDay], today: datetime = None):
+    from rich import box
+    from rich.table import Table
+
+    today = today or today_start()
+    total = sum(day.total for day in days)
+    overdue = sum(day.total for day in days if day.day < today)
+    table = Table(
+        min_width=75,
+        row_styles=["none"],
+        border_style="cyan",
+        header_style="bold yellow",
+        box=box.SIMPLE,
+        caption=f"{total} open todos, {overdue} overdue",
+    )
+    table.add_column("Day", no_wrap=True)
+    table.add_column("Todo", ratio=1)
+    table.add_column("Priority", width=8, no_wrap=True)
+    table.add_column("ID", width=24, no_wrap=True)
+
+    for day in days:
+        label = "Today" if day.day == today else day.day.strftime("%a %Y-%m-%d")
+        style = "bold red" if day.day < today else "bold"
+        for index, todo in enumerate(day.todos):
+            table.add_row(
+                f"[{style}]{label}[/{style}]" if index == 0 else "",
+                todo.todo,
+                todo.priority,
+                todo.id,
+                end_section=index == len(day.todos) - 1 and day.total == len(day.todos),
+            )
+        if day.total > len(day.todos):
+            table.add_row(
+                "",
+                f"[dim]... and {day.total - len(day.todos)} more[/dim]",
+                end_section=True,
+            )
+
+    console.print(table)
+
+
+def display_stats(console, stats: dict):
+    from rich import box
+    from rich.table import Table
+
+    table = Table(
+        min_width=75,
+        row_styles=["none"],
+        border_style="cyan",
+        header_style="bold yellow",
+        box=box.SIMPLE,
+        caption=completion_caption(stats),
     )
+    row = [stats["total"], stats["done"], stats["open"], stats["overdue"]]
+    for column in ["Total", "Done", "Open", "Overdue"]:
+        table.add_column(column, justify="right")
+    for priority in ["low", "medium", "high"]:
+        table.add_column(priority.capitalize(), justify="right")
+        row.append(stats["priorities"].get(priority, 0))
+    table.add_row(*map(str, row))
+
+    console.print(table)
+
+
+def display_report(console, report: dict[str, dict]):
+    from rich import box
+    from rich.table import Table
+
+    columns = ["total", "open", "done", "overdue"]
+    totals = {
+        column: sum(stats[column] for stats in report.values()) for column in columns
+    }
+    table = Table(
+        min_width=75,
+        row_styles=["none"],
+        border_style="cyan",
+        header_style="bold yellow",
+        footer_style="bold",
+        box=box.SIMPLE,
+        show_footer=True,
+        caption=completion_caption(totals),
+    )
+    table.add_column("User", footer=f"{len(report)} users")
+    for column in columns:
+        table.add_column(
+            column.capitalize(), footer=str(totals[column]), justify="right"
+        )
+    for user, stats in report.items():
+        table.add_row(user, *(str(stats[column]) for column in columns))
 
     console.print(table)
 
 
+def filter_from_args(args) -> TodoFilter:
+    query = make_filter(
+        args.priority, args.status, args.from_date, args.before, args.text
+    )
+    if args.action in ["done", "delete"]:
+        if not query.is_empty() and args.todo_ids:
+            raise ValueError("Give either todo ids or filters, not both")
+        if query.is_empty() and not args.todo_ids:
+            raise ValueError("Give at least one todo id or filter")
+        # Dry runs count filter matches, an id list would be written anyway
+        if args.dry_run and args.todo_ids:
+            raise ValueError("--dry-run only works with filters, not todo ids")
+    return query
+
+
+def plain_row(todo: Todo) -> str:
+    return (
+        f"{format_datetime(todo.end_date) or '-':<10}  {todo.priority:<6}  "
+        f"{'yes' if todo.done else 'no':<3}  {todo.id}  {todo.todo}\n"
+    )
+
+
+def tsv_row(todo: Todo) -> str:
+    # Tabs and line breaks in the text would shift the columns
+    text = todo.todo.replace("\t", " ").replace("\n", " ").replace("\r", " ")
+    return (
+        f"{format_datetime(todo.end_date) or ''}\t{text}\t{todo.priority}\t"
+        f"{'yes' if todo.done else 'no'}\t{todo.id}\n"
+    )
+
+
+def json_row(todo: Todo) -> str:
+    import json
+    from todo.src.exporter import to_record
+
+    return json.dumps(to_record(todo)) + "\n"
+
+
+ROW_FORMATS = {"plain": plain_row, "tsv": tsv_row, "json": json_row}
+TSV_HEADER = "end_date\ttodo\tpriority\tdone\tid\n"
+
+
+def write_rows(out, pages: Iterable[list[Todo]], output: str) -> None:
+    """Write todos one line each as their pages arrive, without any layout"""
+    row = ROW_FORMATS[output]
+    try:
+        if output == "tsv":
+            out.write(TSV_HEADER)
+        for page in pages:
+            out.write("".join(map(row, page)))
+        out.flush()
+    except BrokenPipeError:
+        # The reader is gone (`todo list user | head`), stop quietly
+        if out is sys.stdout:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+
+
+def output_format(console, args) -> str:
+    """The --output asked for, else a table on terminals and plain when piped"""
+    output = getattr(args, "output", None)
+    if output:
+        return output
+    return "table" if console.is_terminal else "plain"
+
+
+def list_table(console, args):
+    query = filter_from_args(args)
+    output = output_format(console, args)
+    include_archived = getattr(args, "include_archived", False)
+    if output != "table":
+        pages = list_pages(
+            args.user.lower(),
+            args.sort,
+            query,
+            args.page_size,
+            args.limit,
+            parse_cursor(args.after) if args.after else None,
+            ALL_FIELDS if output == "json" else FIELDS,
+            include_archived,
+        )
+        write_rows(console.file, pages, output)
+        return
+
+    pages = list_pages(
+        args.user.lower(),
+        args.sort,
+        query,
+        args.page_size,
+        args.limit,
+        parse_cursor(args.after) if args.after else None,
+        include_archived=include_archived,
+    )
+    last_todo = display_table(console, pages)
+    stats = todo_stats(args.user.lower(), query)
+    if include_archived:
+        # Archived todos are all done
+        archived = count_archived(args.user.lower(), query)
+        stats = {**stats, "total": stats["total"] + archived}
+        stats["done"] += archived
+    console.print(
+        completion_caption(stats),
+        style="table.caption",
+        justify="center",
+    )
+
+    if args.limit and last_todo and (args.sort or args.after):
+        console.print(f"Next page: --after {format_cursor(last_todo)}", style="dim")
+
+
+def update_where(console, args, query: TodoFilter, update, verb: str):
+    if args.dry_run:
+        count = count_todos(args.user.lower(), query)
+        display_success(console, f"{count} todos would be {verb} (dry run)")
+    else:
+        count = update(args.user.lower(), query)
+        display_success(console, f"{count} todos {verb} successfully")
+
+
+def import_file(console, args):
+    from todo.src.importer import import_todos
+
+    def on_error(line_number: int, message: str):
+        console.print(f"[bold red][ERROR][/bold red] Line {line_number}: {message}")
+
+    with console.status("Importing todos...") as status:
+        report = import_todos(
+            args.user.lower(),
+            args.file,
+            args.format,
+            args.batch_size,
+            on_progress=lambda report: status.update(
+                f"Importing todos... {report.imported} imported, "
+                f"{report.failed} failed"
+            ),
+            on_error=on_error,
+        )
+
+    message = f"Imported {report.imported} todos"
+    if report.failed:
+        display_error(console, f"{message}, {report.failed} rows failed")
+    else:
+        display_success(console, message)
+
+
+def archive_file(console, args):
+    older_than = args.older_than or archive_settings().get("older_than", "30d")
+    with console.status("Archiving todos...") as status:
+        archived = archive_todos(
+            args.user.lower(),
+            older_than,
+            args.batch_size,
+            on_batch=lambda count: status.update(
+                f"Archiving todos... {count} archived"
+            ),
+        )
+    display_success(
+        console, f"Archived {archived} todos done more than {older_than} ago"
+    )
+
+
+def export_file(console, args):
+    from rich.console import Console
+    from todo.src.exporter import export_todos, parse_since
+
+    since = parse_since(args.since) if args.since else None
+    # Rows changed while the export runs are picked up by the next one
+    started = utcnow()
+    if args.output:
+        with open(args.output, "w", newline="") as out, console.status(
+            "Exporting todos..."
+        ) as status:
+            exported = export_todos(
+                args.user.lower(),
+                out,
+                args.format,
+                args.batch_size,
+                since,
+                on_progress=lambda count: status.update(
+                    f"Exporting todos... {count} exported"
+                ),
+                include_archived=args.include_archived,
+            )
+    else:
+        exported = export_todos(
+            args.user.lower(),
+            sys.stdout,
+            args.format,
+            args.batch_size,
+            since,
+            include_archived=args.include_archived,
+        )
+        # Keep stdout for the todos themselves
+        console = Console(stderr=True)
+
+    display_success(
+        console,
+        f"Exported {exported} todos, next incremental run: "
+        f"--since {started.isoformat()}",
+    )
+
+
+def admin(console, args):
+    if args.admin_action == "ensure-indexes":
+        for user, names in ensure_indexes(args.users).items():
+            display_success(console, f"Indexes ready for {user}: {', '.join(names)}")
+    elif args.admin_action == "backfill-ranks":
+        for user, count in backfill_ranks(args.users).items():
+            display_success(console, f"Priority ranks stored for {user}: {count}")
+    elif args.admin_action == "report":
+        display_report(console, user_report(args.users, args.workers))
+    elif args.admin_action == "migrate-layout":
+        with console.status("Migrating todos...") as status:
+            copied = migrate_layout(
+                args.batch_size,
+                on_batch=lambda user, count: status.update(
+                    f"Migrating todos... {user}: {count} synced"
+                ),
+            )
+        display_success(
+            console,
+            f"Synced {sum(copied.values())} todos of {len(copied)} users "
+            'to the shared layout, set mongo_layout to "shared" to use it',
+        )
+    else:
+        display_error(console, f"Invalid admin action: {args.admin_action}")
+
+
+def display_rejected(console, journaled=None) -> None:
+    """Print the journaled writes the backend rejected, once"""
+    from todo.src.storage import get_journaled
+
+    journaled = journaled or get_journaled()
+    if journaled is None:
+        return
+    for message in journaled.journal.take_rejected():
+        console.print(f"[bold red][ERROR][/bold red] {message}")
+
+
+def sync(console, args):
+    from todo.src.storage import get_journaled
+
+    journaled = get_journaled()
+    if journaled is None:
+        if not args.background:
+            display_error(console, "The write journal is not enabled")
+        return
+
+    report = journaled.flush(wait=not args.background)
+    if report is None or args.background:
+        return
+    display_rejected(console, journaled)
+    display_success(
+        console,
+        f"Synced {report.added} added, {report.done} done "
+        f"and {report.deleted} deleted todos",
+    )
+
+
 def app(console, args):
+    profile = None
     try:
+        if getattr(args, "profile", False):
+            from todo.src.profiling import Profile
+
+            profile = Profile(args.started, args.profile_dump).start()
+
         if args.action == "add":
             todo_id = add_todo(
                 args.user.lower(), args.todo, args.priority, args.end_date
             )
             display_success(console, "Todo added successfully", todo_id)
         elif args.action == "delete":
-            deleted_count = delete_todo(args.user.lower(), args.todo_id)
-            if deleted_count:
-                display_success(console, "Todo deleted successfully", args.todo_id)
+            query = filter_from_args(args)
+            if not query.is_empty():
+                update_where(console, args, query, delete_where, "deleted")
             else:
-                display_error(console, "Todo not found", args.todo_id)
+                deleted, missing = delete_todos(
+                    args.user.lower(), read_todo_ids(args.todo_ids)
+                )
+                display_matches(console, "deleted successfully", deleted, missing)
         elif args.action == "list":
-            results = list_todos(args.user.lower(), args.sort, args.priority)
-            display_table(console, results)
+            if args.explain:
+                plan = explain_todos(
+                    args.user.lower(), args.sort, query=filter_from_args(args)
+                )
+                console.print_json(data=plan, default=str)
+            else:
+                list_table(console, args)
         elif args.action == "done":
-            modified_count = mark_as_done(args.user.lower(), args.todo_id)
-            if modified_count:
-                display_success(
-                    console, "Todo marked as done successfully", args.todo_id
+            query = filter_from_args(args)
+            if not query.is_empty():
+                # Todos that are already done would not change, so leave them
+                # out of the match (and of the dry run count) unless asked for.
+                if query.done is None:
+                    query = replace(query, done=False)
+                update_where(console, args, query, mark_done_where, "marked as done")
+            else:
+                done, missing = mark_all_as_done(
+                    args.user.lower(), read_todo_ids(args.todo_ids)
                 )
+                display_matches(console, "marked as done successfully", done, missing)
+            archived = auto_archive(args.user.lower())
+            if archived:
+                display_success(console, f"{archived} old done todos archived")
+        elif args.action == "next":
+            output = output_format(console, args)
+            todos = next_todos(
+                args.user.lower(),
+                args.count,
+                ALL_FIELDS if output == "json" else FIELDS,
+            )
+            if output == "table":
+                display_table(console, [todos])
             else:
-                display_error(console, "Todo not found", args.todo_id)
+                write_rows(console.file, [todos], output)
+        elif args.action == "watch":
+            from todo.src.watch import watch_todos
+
+            try:
+                watch_todos(console, args.user.lower(), args.interval, args.limit)
+            except KeyboardInterrupt:
+                pass
+        elif args.action == "due":
+            display_agenda(
+                console,
+                todo_agenda(
+                    args.user.lower(),
+                    due_filter(args.overdue, args.within, args.priority),
+                    args.per_day,
+                ),
+            )
+        elif args.action == "stats":
+            display_stats(
+                console, todo_stats(args.user.lower(), filter_from_args(args))
+            )
+        elif args.action == "archive":
+            archive_file(console, args)
+        elif args.action == "import":
+            import_file(console, args)
+        elif args.action == "export":
+            export_file(console, args)
+        elif args.action == "admin":
+            admin(console, args)
+        elif args.action == "sync":
+            sync(console, args)
+        elif args.action == "shell":
+            from todo.__main__ import create_arg_parser
+            from todo.src.shell import TodoShell
+
+            TodoShell(console, args.user.lower(), create_arg_parser()).cmdloop()
+        elif args.action == "daemon":
+            from todo.client import socket_path
+            from todo.src.daemon import serve
+
+            serve(console, args.socket or socket_path())
         else:
             display_error(console, f"Invalid action: {args.action}")
+        if args.action not in ["sync", "daemon"]:
+            # Left by background syncs, which have no console of their own
+            display_rejected(console)
     except Exception as e:
         display_error(console, str(e))
+    finally:
+        if profile:
+            profile.stop()
+            profile.display(console)
@@ -0,0 +1,105 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from todo.src.app import (
+    add_todo,
+    archive_todos,
+    count_todos,
+    delete_todo,
+    delete_todos,
+    delete_where,
+    list_todos,
+    mark_all_as_done,
+    mark_as_done,
+    mark_done_where,
+    next_todos,
+    todo_agenda,
+    todo_stats,
+)
+from todo.src.model import Todo
+from todo.src.storage import AgendaDay, TodoFilter
+
+
+class AsyncTodoApp:
+    """Asyncio front end for the todo functions in ``todo.src.app``.
+
+    pymongo and sqlite3 both block, so every call runs on a thread pool that
+    is bounded by ``max_workers``: that many requests can be in flight at
+    once, the rest queue without ever blocking the event loop.
+    """
+
+    def __init__(self, max_workers: int = 8):
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="todo")
+
+    async def __aenter__(self) -> "AsyncTodoApp":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+
+    async def run(self, function, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, partial(function, *args, **kwargs)
+        )
+
+    async def add_todo(
+        self, user: str, todo: str, priority: str, end_date: str = None
+    ) -> str:
+        return await self.run(add_todo, user, todo, priority, end_date)
+
+    async def delete_todo(self, user: str, todo_id: str) -> int:
+        return await self.run(delete_todo, user, todo_id)
+
+    async def delete_todos(
+        self, user: str, todo_ids: list[str]
+    ) -> tuple[list[str], list[str]]:
+        return await self.run(delete_todos, user, todo_ids)
+
+    async def delete_where(self, user: str, query: TodoFilter) -> int:
+        return await self.run(delete_where, user, query)
+
+    async def mark_as_done(self, user: str, todo_id: str) -> int:
+        return await self.run(mark_as_done, user, todo_id)
+
+    async def mark_all_as_done(
+        self, user: str, todo_ids: list[str]
+    ) -> tuple[list[str], list[str]]:
+        return await self.run(mark_all_as_done, user, todo_ids)
+
+    async def mark_done_where(self, user: str, query: TodoFilter) -> int:
+        return await self.run(mark_done_where, user, query)
+
+    async def list_todos(self, user: str, *args, **kwargs) -> list[Todo]:
+        # Rows are read on the worker too, a lazy cursor would block the loop
+        return await self.run(lambda: list(list_todos(user, *args, **kwargs)))
+
+    async def list_many(self, users: list[str], *args, **kwargs) -> dict:
+        """List several users concurrently, keyed by user"""
+        listings = await asyncio.gather(
+            *(self.list_todos(user, *args, **kwargs) for user in users)
+        )
+        return dict(zip(users, listings))
+
+    async def count_todos(self, user: str, query: TodoFilter = None) -> int:
+        return await self.run(count_todos, user, query)
+
+    async def todo_stats(self, user: str, query: TodoFilter = None) -> dict:
+        return await self.run(todo_stats, user, query)
+
+    async def next_todos(self, user: str, count: int = 5) -> list[Todo]:
+        return await self.run(next_todos, user, count)
+
+    async def archive_todos(
+        self, user: str, older_than: str = "30d", batch_size: int = 1000
+    ) -> int:
+        return await self.run(archive_todos, user, older_than, batch_size)
+
+    async def todo_agenda(
+        self, user: str, query: TodoFilter, per_day: int = 10
+    ) -> list[AgendaDay]:
+        return await self.run(todo_agenda, user, query, per_day)
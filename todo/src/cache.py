@@ -0,0 +1,247 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Iterator
+
+from todo.src.model import Todo
+from todo.src.storage.base import TodoBackend, TodoFilter
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "todo", "cache.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    user TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    user TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+"""
+
+# Methods that never change data; anything else that goes through the
+# cached backend is treated as a write and invalidates the user's entries.
+READS = {
+    "find",
+    "count",
+    "stats",
+    "agenda",
+    "most_urgent",
+    "watch",
+    "find_archived",
+    "count_archived",
+    "explain",
+    "ensure_indexes",
+    "list_users",
+    "close",
+}
+
+
+def to_json(todo: Todo) -> list:
+    return [
+        todo.id,
+        todo.todo,
+        todo.priority,
+        todo.end_date.isoformat() if todo.end_date else None,
+        todo.done,
+        todo.updated_at.isoformat() if todo.updated_at else None,
+    ]
+
+
+def from_json(row: list) -> Todo:
+    # Entries cached before updated_at existed have five columns
+    end_date = datetime.fromisoformat(row[3]) if row[3] else None
+    updated_at = datetime.fromisoformat(row[5]) if row[5:6] != [None] else None
+    return Todo(row[0], row[1], row[2], end_date, row[4], updated_at)
+
+
+class ListCache:
+    """Size bounded, TTL limited store of query results, kept in SQLite.
+
+    Every user has a version stamp that writes bump. Entries remember the
+    version that was current *before* their query ran, so a result that may
+    predate a local write is never served. Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_PATH,
+        ttl: float = 60,
+        max_entries: int = 256,
+        max_rows: int = 10000,
+    ):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False
+        )
+        self.lock = threading.RLock()
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+
+    @classmethod
+    def from_config(cls, config: dict) -> "ListCache":
+        return cls(
+            os.path.expanduser(config.get("path", DEFAULT_PATH)),
+            config.get("ttl", 60),
+            config.get("max_entries", 256),
+            config.get("max_rows", 10000),
+        )
+
+    def version(self, user: str) -> int:
+        row = self.connection.execute(
+            "SELECT version FROM versions WHERE user = ?", (user,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def invalidate(self, user: str) -> None:
+        with self.lock, self.connection:
+            self.connection.execute("BEGIN")
+            self.connection.execute(
+                "INSERT INTO versions (user, version) VALUES (?, 1)"
+                " ON CONFLICT (user) DO UPDATE SET version = version + 1",
+                (user,),
+            )
+            self.connection.execute("DELETE FROM entries WHERE user = ?", (user,))
+
+    def get(self, user: str, key: str, version: int):
+        now = time.time()
+        row = self.connection.execute(
+            "SELECT value FROM entries WHERE key = ? AND version = ? AND created > ?",
+            (key, version, now - self.ttl),
+        ).fetchone()
+        if row is None:
+            return None
+
+        with self.lock:
+            self.connection.execute(
+                "UPDATE entries SET accessed = ? WHERE key = ?", (now, key)
+            )
+        return json.loads(row[0])
+
+    def put(self, user: str, key: str, version: int, value) -> None:
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.execute("BEGIN")
+            self.connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (key, user, version, now, now, json.dumps(value)),
+            )
+            self.connection.execute(
+                "DELETE FROM entries WHERE created <= ? OR key NOT IN"
+                " (SELECT key FROM entries ORDER BY accessed DESC LIMIT ?)",
+                (now - self.ttl, self.max_entries),
+            )
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class CachedBackend:
+    """Read-through cache in front of another backend.
+
+    The wrapped backend is only built on the first cache miss or write, so a
+    cached listing never opens a database connection. ``scope`` names the
+    database behind it (see ``backend_fingerprint``), so configs sharing a
+    cache file never see each other's rows.
+    """
+
+    def __init__(
+        self, factory: Callable[[], TodoBackend], cache: ListCache, scope: str = ""
+    ):
+        self.factory = factory
+        self.cache = cache
+        self.scope = scope
+        self._backend = None
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self) -> TodoBackend:
+        with self._lock:
+            if self._backend is None:
+                self._backend = self.factory()
+        return self._backend
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.backend, name)
+        if name in READS or not callable(attribute):
+            return attribute
+
+        def write(user: str, *args, **kwargs):
+            try:
+                return attribute(user, *args, **kwargs)
+            finally:
+                self.cache.invalidate(user)
+
+        return write
+
+    def key(self, user: str, method: str, *args) -> str:
+        return json.dumps([self.scope, user, method, *args], default=str)
+
+    def cached(self, user: str, method: str, load: Callable, *args):
+        key = self.key(user, method, *args)
+        version = self.cache.version(user)
+        value = self.cache.get(user, key, version)
+        if value is None:
+            value = load()
+            self.cache.put(user, key, version, value)
+        return value
+
+    def find(
+        self,
+        user: str,
+        query: TodoFilter = TodoFilter(),
+        sort: bool = False,
+        limit: int = None,
+        after: tuple = None,
+        fields: tuple = None,
+    ):
+        args = (query, sort, limit, after, fields)
+        key = self.key(user, "find", *args)
+        version = self.cache.version(user)
+        rows = self.cache.get(user, key, version)
+        if rows is not None:
+            return map(from_json, rows)
+        return self.find_through(user, key, version, args)
+
+    def find_through(
+        self, user: str, key: str, version: int, args: tuple
+    ) -> Iterator[Todo]:
+        # Stream from the backend while collecting the rows, and only store
+        # listings that were read to the end and fit within max_rows.
+        rows = []
+        for todo in self.backend.find(user, *args):
+            if rows is not None:
+                rows.append(to_json(todo))
+                if len(rows) > self.cache.max_rows:
+                    rows = None
+            yield todo
+        if rows is not None:
+            self.cache.put(user, key, version, rows)
+
+    def count(self, user: str, query: TodoFilter = TodoFilter()) -> int:
+        return self.cached(
+            user, "count", lambda: self.backend.count(user, query), query
+        )
+
+    def stats(self, user: str, query: TodoFilter, today: datetime) -> dict:
+        return self.cached(
+            user, "stats", lambda: self.backend.stats(user, query, today), query, today
+        )
+
+    def close(self) -> None:
+        self.cache.close()
+        if self._backend is not None:
+            self._backend.close()
@@ -0,0 +1,23 @@
+import json
+import os
+
+SECRETS_FILE = "secrets.json"
+
+_config = None
+
+
+def read_config(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def load_config() -> dict:
+    global _config
+
+    if _config is None:
+        _config = read_config(os.environ.get("TODO_SECRETS", SECRETS_FILE))
+
+    return _config
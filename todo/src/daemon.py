@@ -0,0 +1,95 @@
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+from argparse import Namespace
+
+from rich.console import Console
+
+from todo.client import ACCEPTED
+from todo.src.app import app, display_success, new_table
+from todo.src.config import SECRETS_FILE, load_config, read_config
+from todo.src.storage import backend_fingerprint, get_backend
+
+
+class CommandHandler(socketserver.StreamRequestHandler):
+    """Run one forwarded command, streaming its output back to the client"""
+
+    def handle(self):
+        request = json.loads(self.rfile.readline())
+        if client_fingerprint(request) != self.server.fingerprint:
+            # The client runs the command itself, on its own database
+            self.wfile.write(b"refused\n")
+            return
+        self.wfile.write(ACCEPTED.encode())
+        output = io.TextIOWrapper(self.wfile, encoding="utf-8", write_through=True)
+        console = Console(
+            file=output,
+            width=request["width"],
+            force_terminal=request["color"],
+            color_system="standard" if request["color"] else None,
+        )
+        try:
+            app(console, Namespace(**request["args"]))
+        finally:
+            output.detach()
+
+
+def client_fingerprint(request: dict) -> str:
+    """The database the client would use, from its working directory and env"""
+    cwd, env = request.get("cwd"), request.get("env", {})
+    if not cwd:
+        return None
+    config = read_config(os.path.join(cwd, env.get("TODO_SECRETS", SECRETS_FILE)))
+    return backend_fingerprint(config, env, cwd)
+
+
+def is_running(path: str) -> bool:
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        client.close()
+
+
+def create_server(path: str) -> socketserver.UnixStreamServer:
+    if is_running(path):
+        raise Exception(f"A daemon is already listening on {path}")
+    if os.path.exists(path):
+        os.remove(path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    # Only the owner may connect, the socket runs commands as them
+    umask = os.umask(0o177)
+    try:
+        server = socketserver.UnixStreamServer(path, CommandHandler)
+    finally:
+        os.umask(umask)
+    server.fingerprint = backend_fingerprint(load_config())
+    return server
+
+
+def serve(console, path: str) -> None:
+    """Answer forwarded commands until interrupted.
+
+    Commands run one at a time on a backend (and connection pool) built once
+    up front, with the rendering code already imported.
+    """
+    get_backend()
+    new_table(True)
+    server = create_server(path)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    display_success(console, f"Daemon listening on {path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(path)
@@ -0,0 +1,79 @@
+import csv
+import json
+from datetime import datetime, timezone
+from typing import Callable, TextIO
+
+from todo.src.app import list_pages
+from todo.src.model import ALL_FIELDS, Todo
+from todo.src.storage import TodoFilter
+
+FORMATS = ["jsonl", "csv"]
+# The importer reads these columns back and ignores the others
+COLUMNS = ["id", "todo", "priority", "end_date", "done", "updated_at"]
+
+
+def parse_since(value: str) -> datetime:
+    """Parse an ISO date or datetime as naive UTC, the way todos store it"""
+    try:
+        since = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid --since value: {value} (expected ISO 8601)")
+    if since.tzinfo:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return since
+
+
+def to_record(todo: Todo) -> dict:
+    return {
+        "id": todo.id,
+        "todo": todo.todo,
+        "priority": todo.priority,
+        "end_date": todo.end_date.strftime("%Y-%m-%d") if todo.end_date else None,
+        "done": todo.done,
+        "updated_at": todo.updated_at.isoformat() if todo.updated_at else None,
+    }
+
+
+def export_todos(
+    user: str,
+    out: TextIO,
+    file_format: str = "jsonl",
+    batch_size: int = 1000,
+    since: datetime = None,
+    on_progress: Callable[[int], None] = None,
+    include_archived: bool = False,
+) -> int:
+    """Stream the user's todos to ``out`` as JSONL or CSV, returning the count.
+
+    Todos are read one keyset page of ``batch_size`` at a time and written
+    straight out, so memory use does not grow with the list. ``since`` only
+    exports the todos added or changed since then, ``include_archived`` adds
+    the archived ones.
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown export format: {file_format} (expected {FORMATS})")
+
+    writer = None
+    if file_format == "csv":
+        writer = csv.DictWriter(out, COLUMNS)
+        writer.writeheader()
+
+    exported = 0
+    for page in list_pages(
+        user,
+        sort=True,
+        query=TodoFilter(updated_since=since),
+        page_size=batch_size,
+        fields=ALL_FIELDS,
+        include_archived=include_archived,
+    ):
+        records = map(to_record, page)
+        if writer:
+            writer.writerows(records)
+        else:
+            out.writelines(json.dumps(record) + "\n" for record in records)
+        exported += len(page)
+        if on_progress:
+            on_progress(exported)
+
+    return exported
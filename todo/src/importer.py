@@ -0,0 +1,125 @@
+import csv
+import json
+from dataclasses import dataclass
+from typing import Callable, Iterator
+
+from todo.src.app import batched, new_todo, parse_date
+from todo.src.model import Todo
+from todo.src.storage import get_backend
+
+FORMATS = ["csv", "jsonl"]
+PRIORITIES = ["low", "medium", "high"]
+TRUE_VALUES = {"1", "true", "yes", "y"}
+FALSE_VALUES = {"", "0", "false", "no", "n"}
+
+
+@dataclass
+class ImportReport:
+    imported: int = 0
+    failed: int = 0
+
+
+def detect_format(path: str) -> str:
+    extension = path.rsplit(".", 1)[-1].lower()
+    if extension not in FORMATS:
+        raise ValueError(
+            f"Cannot guess the format of {path}, use --format {'|'.join(FORMATS)}"
+        )
+    return extension
+
+
+def read_csv(f) -> Iterator[tuple[int, dict]]:
+    reader = csv.DictReader(f)
+    for record in reader:
+        yield reader.line_num, record
+
+
+def read_jsonl(f) -> Iterator[tuple[int, object]]:
+    for line_number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, ValueError(f"Invalid JSON: {e.msg}")
+
+
+def parse_done(value) -> bool:
+    if isinstance(value, bool) or value is None:
+        return bool(value)
+    if str(value).strip().lower() in TRUE_VALUES:
+        return True
+    if str(value).strip().lower() in FALSE_VALUES:
+        return False
+    raise ValueError(f"Invalid done value: {value}")
+
+
+def to_todo(record) -> Todo:
+    if isinstance(record, Exception):
+        raise record
+    if not isinstance(record, dict):
+        raise ValueError("Expected an object with a 'todo' field")
+
+    todo = record.get("todo")
+    if not todo or not isinstance(todo, str):
+        raise ValueError("Missing 'todo' field")
+
+    priority = record.get("priority") or "medium"
+    if priority not in PRIORITIES:
+        raise ValueError(f"Invalid priority: {priority}")
+
+    end_date = record.get("end_date") or None
+    if end_date is not None and not isinstance(end_date, str):
+        raise ValueError(f"Invalid end date: {end_date}")
+
+    return new_todo(
+        todo,
+        priority,
+        parse_date(end_date) if end_date else None,
+        parse_done(record.get("done")),
+    )
+
+
+def import_todos(
+    user: str,
+    path: str,
+    file_format: str = None,
+    batch_size: int = 1000,
+    on_progress: Callable[[ImportReport], None] = None,
+    on_error: Callable[[int, str], None] = None,
+) -> ImportReport:
+    """Stream todos from a CSV or JSONL file into the user's list.
+
+    Rows are validated and written one batch at a time, so memory use only
+    depends on ``batch_size``. Invalid rows are skipped and reported through
+    ``on_error`` with their line number.
+    """
+    file_format = file_format or detect_format(path)
+    reader = read_csv if file_format == "csv" else read_jsonl
+    backend = get_backend()
+    report = ImportReport()
+
+    with open(path, newline="" if file_format == "csv" else None) as f:
+        for batch in batched(reader(f), batch_size):
+            line_numbers, todos = [], []
+            for line_number, record in batch:
+                try:
+                    todos.append(to_todo(record))
+                    line_numbers.append(line_number)
+                except ValueError as e:
+                    report.failed += 1
+                    if on_error:
+                        on_error(line_number, str(e))
+
+            if todos:
+                inserted, errors = backend.add_many(user, todos)
+                report.imported += inserted
+                report.failed += len(errors)
+                for index, message in errors.items():
+                    if on_error:
+                        on_error(line_numbers[index], message)
+
+            if on_progress:
+                on_progress(report)
+
+    return report
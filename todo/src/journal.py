@@ -0,0 +1,268 @@
+import fcntl
+import json
+import os
+import subprocess
+import sys
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable
+
+from bson.objectid import ObjectId
+
+from todo.src.model import Todo
+from todo.src.storage.base import TodoBackend
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "todo", "journal.jsonl")
+
+
+@dataclass
+class Plan:
+    """The net effect of a user's journal entries."""
+
+    adds: dict = field(default_factory=dict)
+    done: dict = field(default_factory=dict)
+    deleted: dict = field(default_factory=dict)
+
+
+@dataclass
+class SyncReport:
+    added: int = 0
+    done: int = 0
+    deleted: int = 0
+    errors: list = field(default_factory=list)
+
+
+def coalesce(entries) -> dict[str, Plan]:
+    """Collapse journal entries into one net operation per todo.
+
+    A todo added and deleted before a flush never reaches the server, one
+    added then marked as done is inserted as done, and so on. Dicts are
+    used as ordered sets.
+    """
+    plans = {}
+    for entry in entries:
+        plan = plans.setdefault(entry["user"], Plan())
+        if entry["op"] == "add":
+            end_date = entry["end_date"]
+            plan.adds[entry["id"]] = Todo(
+                entry["id"],
+                entry["todo"],
+                entry["priority"],
+                datetime.fromisoformat(end_date) if end_date else None,
+                entry["done"],
+            )
+        for todo_id in entry.get("ids", []):
+            if entry["op"] == "done":
+                if todo_id in plan.adds:
+                    plan.adds[todo_id].done = True
+                elif todo_id not in plan.deleted:
+                    plan.done[todo_id] = True
+            elif entry["op"] == "delete":
+                if plan.adds.pop(todo_id, None) is None:
+                    plan.done.pop(todo_id, None)
+                    plan.deleted[todo_id] = True
+    return plans
+
+
+def replay(backend: TodoBackend, plans: dict[str, Plan], report: SyncReport):
+    for user, plan in plans.items():
+        if plan.adds:
+            inserted, errors = backend.add_many(user, list(plan.adds.values()))
+            report.added += inserted
+            report.errors += [f"{user}: {message}" for message in errors.values()]
+        if plan.done:
+            matched = backend.mark_done_many(user, list(plan.done))
+            report.done += len(matched)
+            report.errors += [
+                f"{user}: todo not found (id: {todo_id})"
+                for todo_id in plan.done
+                if todo_id not in set(matched)
+            ]
+        if plan.deleted:
+            matched = backend.delete_many(user, list(plan.deleted))
+            report.deleted += len(matched)
+            report.errors += [
+                f"{user}: todo not found (id: {todo_id})"
+                for todo_id in plan.deleted
+                if todo_id not in set(matched)
+            ]
+
+
+@contextmanager
+def locked(path: str, wait: bool = True):
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | (0 if wait else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        yield True
+    finally:
+        os.close(fd)
+
+
+class Journal:
+    """Append-only, fsynced log of writes waiting to reach the backend.
+
+    Writers append under ``<path>.lock``. A flush holds ``<path>.flush.lock``
+    for its whole duration, briefly takes the writers' lock to rename the
+    journal to ``<path>.flushing``, then replays that file without blocking
+    writers. A flush that fails part way leaves ``.flushing`` behind to be
+    replayed again; ids are assigned client side so replays are harmless.
+
+    Entries the backend rejects are appended to ``<path>.rejected``, since a
+    background sync has nowhere to print them, until ``take_rejected`` reads
+    them for display.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.flushing_path = f"{path}.flushing"
+        self.lock_path = f"{path}.lock"
+        self.flush_lock_path = f"{path}.flush.lock"
+        self.rejected_path = f"{path}.rejected"
+
+    def append(self, entry: dict) -> None:
+        line = (json.dumps(entry) + "\n").encode()
+        with locked(self.lock_path):
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, line)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def reject(self, messages: list[str]) -> None:
+        with locked(self.lock_path), open(self.rejected_path, "a") as f:
+            f.writelines(json.dumps(message) + "\n" for message in messages)
+
+    def take_rejected(self) -> list[str]:
+        """Messages of the entries rejected since the last call"""
+        if not os.path.exists(self.rejected_path):
+            return []
+        with locked(self.lock_path):
+            try:
+                messages = self.read(self.rejected_path)
+            except FileNotFoundError:
+                return []
+            os.remove(self.rejected_path)
+        return messages
+
+    def pending(self) -> bool:
+        return os.path.exists(self.path) or os.path.exists(self.flushing_path)
+
+    def read(self, path: str) -> list[dict]:
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.endswith("\n")]
+
+    def flush(self, backend: TodoBackend, wait: bool = True) -> SyncReport:
+        """Replay pending entries; returns None if another flush is running."""
+        report = SyncReport()
+        with locked(self.flush_lock_path, wait) as acquired:
+            if not acquired:
+                return None
+            while self.pending():
+                if not os.path.exists(self.flushing_path):
+                    with locked(self.lock_path):
+                        os.rename(self.path, self.flushing_path)
+                errors = len(report.errors)
+                replay(backend, coalesce(self.read(self.flushing_path)), report)
+                if report.errors[errors:]:
+                    self.reject(report.errors[errors:])
+                os.remove(self.flushing_path)
+        return report
+
+
+class JournaledBackend:
+    """Acknowledge add/done/delete once journaled, replay them in batches.
+
+    Any other call flushes the journal first, so reads always see the local
+    writes. With ``auto_flush`` set to "background", every write starts a
+    detached ``todo sync --background`` so the command itself returns as
+    soon as the entry is on disk.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], TodoBackend],
+        journal: Journal,
+        auto_flush: str = "background",
+    ):
+        self.factory = factory
+        self.journal = journal
+        self.auto_flush = auto_flush
+        self._backend = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, factory: Callable, config: dict) -> "JournaledBackend":
+        journal = Journal(os.path.expanduser(config.get("path", DEFAULT_PATH)))
+        return cls(factory, journal, config.get("auto_flush", "background"))
+
+    @property
+    def backend(self) -> TodoBackend:
+        with self._lock:
+            if self._backend is None:
+                self._backend = self.factory()
+        return self._backend
+
+    def __getattr__(self, name: str):
+        if self.journal.pending():
+            self.flush()
+        return getattr(self.backend, name)
+
+    def flush(self, wait: bool = True) -> SyncReport:
+        return self.journal.flush(self.backend, wait)
+
+    def close(self) -> None:
+        # Closing must not need the server, pending entries wait for a sync
+        if self._backend is not None:
+            self._backend.close()
+
+    def write(self, entry: dict) -> None:
+        self.journal.append(entry)
+        if self.auto_flush == "background":
+            subprocess.Popen(
+                [sys.executable, "-m", "todo", "sync", "--background"],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+
+    def add(self, user: str, todo: Todo) -> str:
+        todo_id = todo.id or str(ObjectId())
+        self.write(
+            {
+                "op": "add",
+                "user": user,
+                "id": todo_id,
+                "todo": todo.todo,
+                "priority": todo.priority,
+                "end_date": todo.end_date.isoformat() if todo.end_date else None,
+                "done": todo.done,
+            }
+        )
+        return todo_id
+
+    def mark_done(self, user: str, todo_id: str) -> int:
+        return len(self.mark_done_many(user, [str(ObjectId(todo_id))]))
+
+    def mark_done_many(self, user: str, todo_ids: list[str]) -> list[str]:
+        todo_ids = [i.lower() for i in todo_ids if ObjectId.is_valid(i)]
+        if todo_ids:
+            self.write({"op": "done", "user": user, "ids": todo_ids})
+        return todo_ids
+
+    def delete(self, user: str, todo_id: str) -> int:
+        return len(self.delete_many(user, [str(ObjectId(todo_id))]))
+
+    def delete_many(self, user: str, todo_ids: list[str]) -> list[str]:
+        todo_ids = [i.lower() for i in todo_ids if ObjectId.is_valid(i)]
+        if todo_ids:
+            self.write({"op": "delete", "user": user, "ids": todo_ids})
+        return todo_ids
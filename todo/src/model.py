@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone
+
+FIELDS = ("todo", "priority", "end_date", "done")
+# Bookkeeping that listings do not show
+ALL_FIELDS = (*FIELDS, "updated_at")
+KEY = ("id", *FIELDS)
+# Stored next to the priority so the database can sort by urgency
+PRIORITY_RANKS = {"low": 1, "medium": 2, "high": 3}
+# Reads by updated_at look this far behind the previous one, so a todo written
+# by a machine whose clock is a little behind is still picked up
+CLOCK_SKEW = timedelta(seconds=5)
+
+
+def utcnow() -> datetime:
+    """Naive UTC now, the way pymongo hands datetimes back"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class Todo:
+    """A todo row, the one shape every backend and front end hands around.
+
+    ``__slots__`` keeps rows small on big listings. Fields a query did not
+    project are left as None. ``updated_at`` is set by the backends on every
+    insert and update, and the storage adds it to documents itself.
+    """
+
+    __slots__ = ("id", "todo", "priority", "end_date", "done", "updated_at")
+
+    def __init__(
+        self,
+        id: str = None,
+        todo: str = None,
+        priority: str = None,
+        end_date: datetime = None,
+        done: bool = None,
+        updated_at: datetime = None,
+    ):
+        self.id = id
+        self.todo = todo
+        self.priority = priority
+        self.end_date = end_date
+        self.done = done
+        self.updated_at = updated_at
+
+    @classmethod
+    def from_document(cls, document: dict) -> "Todo":
+        return cls(
+            str(document["_id"]),
+            document.get("todo"),
+            document.get("priority"),
+            document.get("end_date"),
+            document.get("done"),
+            document.get("updated_at"),
+        )
+
+    def to_document(self) -> dict:
+        return {
+            "todo": self.todo,
+            "priority": self.priority,
+            "end_date": self.end_date,
+            "done": self.done,
+        }
+
+    def __getitem__(self, key: str):
+        # Listings used to return raw documents, keep "_id" style access working
+        if key == "_id":
+            return self.id
+        if key not in ALL_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __eq__(self, other) -> bool:
+        # Bookkeeping is not content: a row read back equals the one written
+        if not isinstance(other, Todo):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in KEY)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{slot}={getattr(self, slot)!r}" for slot in self.__slots__)
+        return f"Todo({fields})"
+
+
+def sort_key(todo: Todo) -> tuple:
+    """The ``(end_date, _id)`` order of sorted listings, no end date first"""
+    return (todo.end_date is not None, todo.end_date or datetime.min, todo.id)
+
+
+def priority_rank(priority: str) -> int:
+    return PRIORITY_RANKS.get(priority, 0)
+
+
+def projection(fields: tuple = None) -> dict:
+    """Mongo projection for the given fields (None keeps every field)"""
+    return {field: 1 for field in fields} if fields else None
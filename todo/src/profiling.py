@@ -0,0 +1,247 @@
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from types import GeneratorType
+
+from todo.src.config import load_config
+from todo.src.storage import backend_name, get_backend, set_backend
+
+
+@dataclass
+class MongoCommand:
+    name: str
+    ms: float
+    documents: int
+    failed: bool = False
+
+
+def count_documents(reply: dict) -> int:
+    """Documents a Mongo reply returned (find/aggregate) or wrote (n)"""
+    cursor = reply.get("cursor")
+    if cursor:
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+    return reply.get("n", 0)
+
+
+class MongoRecorder:
+    """pymongo command, connection pool and topology listener feeding a
+    ``Profile``.
+
+    Registered globally, so it only sees clients created afterwards.
+    """
+
+    def __init__(self):
+        self.commands = []
+        self.connections = []
+        self.topologies = {}
+        self.server_selection = None
+
+    def topology_opened(self, topology_id) -> None:
+        self.topologies[topology_id] = time.perf_counter()
+
+    def topology_changed(self, topology_id, description) -> None:
+        """Time from opening until a server can be selected, which is what the
+        first command waits for on top of its own round trip"""
+        opened = self.topologies.get(topology_id)
+        if opened and self.server_selection is None:
+            if description.has_readable_server():
+                self.server_selection = (time.perf_counter() - opened) * 1000
+
+    def register(self) -> None:
+        from pymongo import monitoring
+
+        # pymongo checks listeners against its ABCs, so register concrete
+        # subclasses that forward to this recorder.
+        recorder = self
+
+        class Commands(monitoring.CommandListener):
+            def started(self, event):
+                return
+
+            def succeeded(self, event):
+                recorder.commands.append(
+                    MongoCommand(
+                        event.command_name,
+                        event.duration_micros / 1000,
+                        count_documents(event.reply),
+                    )
+                )
+
+            def failed(self, event):
+                recorder.commands.append(
+                    MongoCommand(
+                        event.command_name, event.duration_micros / 1000, 0, True
+                    )
+                )
+
+        class Connections(monitoring.ConnectionPoolListener):
+            def connection_ready(self, event):
+                # Covers the TCP connect, TLS and the MongoDB handshake
+                recorder.connections.append((event.duration or 0) * 1000)
+
+        # Every pool event is abstract, ignore the others
+        for name in vars(monitoring.ConnectionPoolListener):
+            if not name.startswith("_") and name != "connection_ready":
+                setattr(Connections, name, lambda self, event: None)
+
+        class Topology(monitoring.TopologyListener):
+            def opened(self, event):
+                recorder.topology_opened(event.topology_id)
+
+            def description_changed(self, event):
+                recorder.topology_changed(event.topology_id, event.new_description)
+
+            def closed(self, event):
+                return
+
+        monitoring.register(Commands())
+        monitoring.register(Connections())
+        monitoring.register(Topology())
+
+
+class TimedBackend:
+    """Proxy measuring the time spent in backend calls, results included.
+
+    ``ms`` is wall-clock time during which at least one call was running, so
+    calls overlapping on several threads (``admin report``) count once.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.ms = 0.0
+        self.calls = 0
+        self.running = 0
+        self.busy_since = None
+        self.lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.backend, name)
+        if not callable(attribute):
+            return attribute
+
+        def timed(*args, **kwargs):
+            with self.lock:
+                self.calls += 1
+            with self.busy():
+                result = attribute(*args, **kwargs)
+            if isinstance(result, (map, GeneratorType)):
+                return self.iterate(result)
+            return result
+
+        return timed
+
+    @contextmanager
+    def busy(self):
+        with self.lock:
+            if self.running == 0:
+                self.busy_since = time.perf_counter()
+            self.running += 1
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.running -= 1
+                if self.running == 0:
+                    self.ms += (time.perf_counter() - self.busy_since) * 1000
+
+    def iterate(self, rows):
+        while True:
+            with self.busy():
+                row = next(rows, StopIteration)
+            if row is StopIteration:
+                return
+            yield row
+
+
+@dataclass
+class Profile:
+    """Phase breakdown of one command.
+
+    ``started`` is when main() began, so the first phase covers argument
+    parsing and the imports that follow it. The storage phase is the time
+    during which backend calls (queries and reading their results) were
+    running; what is left of the command is rendering and the app code itself.
+    """
+
+    started: float
+    dump: str = None
+    phases: dict = field(default_factory=dict)
+    mongo: MongoRecorder = field(default_factory=MongoRecorder)
+
+    def start(self) -> "Profile":
+        start = time.perf_counter()
+        self.phases["startup and imports"] = (start - self.started) * 1000
+        if backend_name(load_config()) == "mongo":
+            # Listeners only reach clients created after they are registered
+            self.mongo.register()
+        self.backend = TimedBackend(get_backend())
+        set_backend(self.backend)
+        self.phases["config and backend"] = (time.perf_counter() - start) * 1000
+
+        self.profiler = None
+        if self.dump:
+            import cProfile
+
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.command_started = time.perf_counter()
+        return self
+
+    def stop(self) -> None:
+        command_ms = (time.perf_counter() - self.command_started) * 1000
+        if self.profiler:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.dump)
+        set_backend(self.backend.backend)
+
+        self.phases["storage"] = self.backend.ms
+        self.phases["rendering and app"] = command_ms - self.backend.ms
+        self.phases["total"] = sum(self.phases.values())
+
+    def display(self, console) -> None:
+        from rich import box
+        from rich.table import Table
+
+        table = Table(
+            title="Profile",
+            min_width=75,
+            border_style="cyan",
+            header_style="bold yellow",
+            box=box.SIMPLE,
+        )
+        table.add_column("Phase")
+        table.add_column("ms", justify="right")
+        for name, ms in self.phases.items():
+            table.add_row(name, f"{ms:.1f}")
+        console.print(table, f"{self.backend.calls} backend calls")
+
+        mongo = self.mongo
+        if mongo.server_selection is not None:
+            console.print(
+                f"Mongo server selection took {mongo.server_selection:.1f} ms "
+                "(discovering a readable server)"
+            )
+        elif mongo.topologies:
+            console.print("Mongo server selection found no readable server")
+        if mongo.connections:
+            console.print(
+                f"{len(mongo.connections)} Mongo connections opened in "
+                f"{sum(mongo.connections):.1f} ms (connect, TLS and handshake)"
+            )
+        if mongo.commands:
+            commands = Table(
+                min_width=75,
+                border_style="cyan",
+                header_style="bold yellow",
+                box=box.SIMPLE,
+            )
+            commands.add_column("Mongo command")
+            commands.add_column("ms", justify="right")
+            commands.add_column("Documents", justify="right")
+            for command in mongo.commands:
+                name = f"{command.name} (failed)" if command.failed else command.name
+                commands.add_row(name, f"{command.ms:.1f}", str(command.documents))
+            console.print(commands)
+        if self.dump:
+            console.print(f"cProfile stats written to {self.dump}")
@@ -0,0 +1,110 @@
+import cmd
+import os
+import shlex
+
+from todo.src.app import app, display_error, list_todos
+
+HISTORY_PATH = os.path.join(os.path.expanduser("~"), ".cache", "todo", "history")
+HISTORY_LENGTH = 1000
+
+WRITES = {"add", "done", "delete"}
+
+
+class TodoShell(cmd.Cmd):
+    """REPL running the regular subcommands for one user.
+
+    The whole session shares one backend, so only the first command pays for
+    connecting. The user's todos are kept in memory for id completion and
+    only reloaded after a write.
+    """
+
+    def __init__(self, console, user: str, parser):
+        super().__init__()
+        self.console = console
+        self.user = user
+        self.parser = parser
+        self.prompt = f"todo ({user})> "
+        self.todos = None
+
+    def run(self, action: str, line: str) -> None:
+        try:
+            args = self.parser.parse_args([action, self.user, *shlex.split(line)])
+        except ValueError as e:
+            display_error(self.console, str(e))
+            return
+        except SystemExit:
+            # argparse already printed the usage or the --help text
+            return
+
+        app(self.console, args)
+        if action in WRITES:
+            self.todos = None
+
+    def todo_ids(self, prefix: str) -> list[str]:
+        if self.todos is None:
+            self.todos = list(list_todos(self.user, sort=True, fields=("done",)))
+        prefix = prefix.lower()
+        return [todo.id for todo in self.todos if todo.id.startswith(prefix)]
+
+    def do_add(self, line: str):
+        """add TODO [-p PRIORITY] [--end-date YYYY-MM-DD]"""
+        self.run("add", line)
+
+    def do_list(self, line: str):
+        """list [--sort] [-p PRIORITY] [--status STATUS] [--text TEXT] [--limit N]"""
+        self.run("list", line)
+
+    def do_done(self, line: str):
+        """done TODO_ID... | done [filters] [--dry-run]"""
+        self.run("done", line)
+
+    def do_delete(self, line: str):
+        """delete TODO_ID... | delete [filters] [--dry-run]"""
+        self.run("delete", line)
+
+    def do_stats(self, line: str):
+        """stats [filters]"""
+        self.run("stats", line)
+
+    def do_due(self, line: str):
+        """due [--within DURATION] [--overdue] [-p PRIORITY] [--per-day N]"""
+        self.run("due", line)
+
+    def do_next(self, line: str):
+        """next [-n N]"""
+        self.run("next", line)
+
+    def complete_done(self, text: str, line: str, begin: int, end: int):
+        return self.todo_ids(text)
+
+    def complete_delete(self, text: str, line: str, begin: int, end: int):
+        return self.todo_ids(text)
+
+    def do_exit(self, line: str):
+        """exit the shell"""
+        return True
+
+    def do_EOF(self, line: str):
+        self.console.print()
+        return True
+
+    def emptyline(self):
+        # cmd repeats the last command by default, too risky with add/delete
+        pass
+
+    def preloop(self):
+        try:
+            import readline
+        except ImportError:
+            return
+        os.makedirs(os.path.dirname(HISTORY_PATH), exist_ok=True)
+        if os.path.exists(HISTORY_PATH):
+            readline.read_history_file(HISTORY_PATH)
+        readline.set_history_length(HISTORY_LENGTH)
+
+    def postloop(self):
+        try:
+            import readline
+        except ImportError:
+            return
+        readline.write_history_file(HISTORY_PATH)
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import threading
+
+from todo.src.config import load_config
+from .base import AgendaDay, TodoBackend, TodoChange, TodoFilter
+
+BACKENDS = ["mongo", "sqlite"]
+
+_backend = None
+_journaled = None
+# Thread pools (see AsyncTodoApp) may ask for the backend concurrently
+_lock = threading.RLock()
+
+
+def backend_name(config: dict, environ: dict = None) -> str:
+    environ = os.environ if environ is None else environ
+    return environ.get("TODO_BACKEND") or config.get("backend", "mongo")
+
+
+def sqlite_path(config: dict, environ: dict = None) -> str:
+    environ = os.environ if environ is None else environ
+    return environ.get("TODO_SQLITE_PATH") or config.get("sqlite_path", "todo.db")
+
+
+def backend_fingerprint(config: dict, environ: dict = None, cwd: str = None) -> str:
+    """Short hash naming the database a config points at (never the URI itself).
+
+    ``environ`` and ``cwd`` default to this process's, the daemon passes a
+    client's to check that it would use the same database.
+    """
+    name = backend_name(config, environ)
+    if name == "mongo":
+        target = [config.get("mongo_uri"), config.get("mongo_layout", "per-user")]
+    else:
+        path = sqlite_path(config, environ)
+        if path != ":memory:":
+            path = os.path.abspath(os.path.join(cwd or os.getcwd(), path))
+        target = [path]
+    digest = hashlib.sha256(json.dumps([name, *target]).encode())
+    return digest.hexdigest()[:16]
+
+
+def create_backend(config: dict) -> TodoBackend:
+    name = backend_name(config)
+
+    if name == "mongo":
+        from .mongo import MongoBackend
+        from .mongo_client import MongoSettings
+
+        if "mongo_uri" not in config:
+            raise ValueError("Missing 'mongo_uri' in secrets.json")
+        return MongoBackend(
+            config["mongo_uri"],
+            layout=config.get("mongo_layout", "per-user"),
+            settings=MongoSettings.from_config(config),
+        )
+    elif name == "sqlite":
+        from .sqlite import SqliteBackend
+
+        return SqliteBackend(sqlite_path(config))
+
+    raise ValueError(f"Unknown storage backend: {name} (expected one of {BACKENDS})")
+
+
+def get_backend() -> TodoBackend:
+    global _backend
+
+    with _lock:
+        if _backend is None:
+            config = load_config()
+            journaled = get_journaled()
+            factory = (
+                (lambda: journaled) if journaled else (lambda: create_backend(config))
+            )
+            if config.get("cache"):
+                from todo.src.cache import CachedBackend, ListCache
+
+                _backend = CachedBackend(
+                    factory,
+                    ListCache.from_config(config["cache"]),
+                    backend_fingerprint(config),
+                )
+            else:
+                _backend = factory()
+
+    return _backend
+
+
+def get_journaled():
+    """The journaled backend, or None when the journal is not enabled"""
+    global _journaled
+
+    with _lock:
+        config = load_config()
+        if _journaled is None and config.get("journal"):
+            from todo.src.journal import JournaledBackend
+
+            _journaled = JournaledBackend.from_config(
+                lambda: create_backend(config), config["journal"]
+            )
+    return _journaled
+
+
+def set_backend(backend: TodoBackend) -> None:
+    global _backend
+    _backend = backend
+
+
+__all__ = [
+    "AgendaDay",
+    "BACKENDS",
+    "TodoBackend",
+    "TodoChange",
+    "TodoFilter",
+    "backend_name",
+    "create_backend",
+    "get_backend",
+    "get_journaled",
+    "set_backend",
+]
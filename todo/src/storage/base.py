@@ -0,0 +1,197 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+from typing import Callable, Iterable, Iterator
+
+from todo.src.model import Todo
+
+
+@dataclass(frozen=True)
+class TodoFilter:
+    """Server-side filter shared by listings and mass updates.
+
+    ``after`` is inclusive and ``before`` exclusive; todos without an end date
+    never match a date range. ``text`` is a case-insensitive substring.
+    ``updated_since`` (inclusive, UTC) matches todos added or changed since.
+    """
+
+    priority: str = None
+    done: bool = None
+    after: datetime = None
+    before: datetime = None
+    text: str = None
+    updated_since: datetime = None
+
+    def is_empty(self) -> bool:
+        return all(getattr(self, field.name) is None for field in fields(self))
+
+
+@dataclass
+class AgendaDay:
+    """One end date of an agenda: its todo count and the first todos"""
+
+    day: datetime
+    total: int
+    todos: list[Todo] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class TodoChange:
+    """A todo written ("upsert", with its new state) or deleted ("delete")"""
+
+    operation: str
+    todo_id: str
+    todo: Todo = None
+
+
+def merge_stats(rows: Iterable[tuple]) -> dict:
+    """Merge per-priority ``(priority, total, done, overdue)`` rows."""
+    stats = {"total": 0, "done": 0, "open": 0, "overdue": 0, "priorities": {}}
+    for priority, total, done, overdue in rows:
+        stats["total"] += total
+        stats["done"] += done
+        stats["open"] += total - done
+        stats["overdue"] += overdue
+        stats["priorities"][priority] = total
+    return stats
+
+
+class TodoBackend(ABC):
+    """Storage interface shared by every todo backend.
+
+    Users are passed already normalised (lower case). Todos go in and come
+    out as ``Todo`` rows whatever the engine stores underneath.
+    """
+
+    @abstractmethod
+    def ensure_indexes(self, user: str) -> list[str]:
+        """Create the indexes used by listings, returning their names."""
+
+    @abstractmethod
+    def list_users(self) -> list[str]: ...
+
+    @abstractmethod
+    def add(self, user: str, todo: Todo) -> str: ...
+
+    @abstractmethod
+    def add_many(self, user: str, todos: list[Todo]) -> tuple[int, dict]:
+        """Insert a batch, returning the inserted count and errors by index."""
+
+    @abstractmethod
+    def delete(self, user: str, todo_id: str) -> int: ...
+
+    @abstractmethod
+    def delete_many(self, user: str, todo_ids: list[str]) -> list[str]:
+        """Delete the given todos, returning the ids that existed."""
+
+    @abstractmethod
+    def mark_done(self, user: str, todo_id: str) -> int: ...
+
+    @abstractmethod
+    def mark_done_many(self, user: str, todo_ids: list[str]) -> list[str]:
+        """Mark the given todos as done, returning the ids that existed."""
+
+    @abstractmethod
+    def find(
+        self,
+        user: str,
+        query: TodoFilter = TodoFilter(),
+        sort: bool = False,
+        limit: int = None,
+        after: tuple = None,
+        fields: tuple = None,
+    ) -> Iterable[Todo]:
+        """List todos; sorted listings are ordered by ``(end_date, _id)``.
+
+        ``after`` is an ``(end_date, _id)`` keyset cursor: only the todos
+        sorted after it are returned, which implies ``sort``. ``fields``
+        limits the columns fetched (ids are always included).
+        """
+
+    @abstractmethod
+    def most_urgent(
+        self, user: str, limit: int, fields: tuple = None
+    ) -> Iterable[Todo]:
+        """The ``limit`` most urgent open todos, read through an index.
+
+        Todos are ordered by priority rank (highest first), then by
+        ``(end_date, _id)`` like sorted listings.
+        """
+
+    @abstractmethod
+    def backfill_ranks(self, user: str) -> int:
+        """Store the rank of todos written without one, returning the count"""
+
+    @abstractmethod
+    def explain(
+        self, user: str, query: TodoFilter = TodoFilter(), sort: bool = False
+    ) -> dict:
+        """Return the query plan the storage engine picks for a listing."""
+
+    @abstractmethod
+    def count(self, user: str, query: TodoFilter = TodoFilter()) -> int: ...
+
+    @abstractmethod
+    def stats(self, user: str, query: TodoFilter, today: datetime) -> dict:
+        """Count todos in one aggregation, see ``merge_stats``.
+
+        Open todos ending before ``today`` are overdue.
+        """
+
+    @abstractmethod
+    def agenda(self, user: str, query: TodoFilter, per_day: int) -> list[AgendaDay]:
+        """Group the todos matching ``query`` by end date, in date order.
+
+        Todos without an end date are left out. Each day carries its full
+        count but at most ``per_day`` todos (sorted by ``_id``), the rest never
+        leave the server.
+        """
+
+    @abstractmethod
+    def delete_where(self, user: str, query: TodoFilter) -> int: ...
+
+    @abstractmethod
+    def mark_done_where(self, user: str, query: TodoFilter) -> int: ...
+
+    @abstractmethod
+    def archive(
+        self,
+        user: str,
+        before: datetime,
+        batch_size: int = 1000,
+        on_batch: Callable[[int], None] = None,
+    ) -> int:
+        """Move done todos last updated before ``before`` to the archive.
+
+        Todos move ``batch_size`` at a time and ``on_batch`` gets the running
+        total. Todos without ``updated_at`` predate it and count as old.
+        """
+
+    @abstractmethod
+    def find_archived(
+        self,
+        user: str,
+        query: TodoFilter = TodoFilter(),
+        sort: bool = False,
+        limit: int = None,
+        after: tuple = None,
+        fields: tuple = None,
+    ) -> Iterable[Todo]:
+        """Like ``find``, on the archived todos"""
+
+    @abstractmethod
+    def count_archived(self, user: str, query: TodoFilter = TodoFilter()) -> int: ...
+
+    @abstractmethod
+    def drop_user(self, user: str) -> None: ...
+
+    def watch(self, user: str) -> Iterator[TodoChange]:
+        """Stream the user's changes as they happen.
+
+        Returns None when the storage cannot push changes, callers then poll
+        on ``updated_at`` instead. The stream only ends when it is closed.
+        """
+        return None
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,626 @@
+import re
+import pymongo
+from datetime import datetime
+from functools import partial
+from itertools import islice
+from typing import Callable, Iterator
+from bson.objectid import ObjectId
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from todo.src.model import (
+    CLOCK_SKEW,
+    PRIORITY_RANKS,
+    Todo,
+    priority_rank,
+    projection,
+    utcnow,
+)
+from .base import AgendaDay, TodoBackend, TodoChange, TodoFilter, merge_stats
+from .mongo_client import MongoSettings, create_client
+
+SORT = [("end_date", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)]
+URGENCY = [("priority_rank", pymongo.DESCENDING), *SORT]
+
+INDEXES = [
+    pymongo.IndexModel(SORT, name="end_date"),
+    pymongo.IndexModel(
+        [("priority", pymongo.ASCENDING), *SORT], name="priority_end_date"
+    ),
+    pymongo.IndexModel([("done", pymongo.ASCENDING), *SORT], name="done_end_date"),
+    pymongo.IndexModel([("updated_at", pymongo.ASCENDING)], name="updated_at"),
+    pymongo.IndexModel(
+        [("done", pymongo.ASCENDING), *URGENCY], name="done_priority_rank"
+    ),
+]
+
+LAYOUTS = ["per-user", "shared"]
+
+# The shared layout keeps every todo in this collection, tagged with its user
+SHARED_COLLECTION = "shared.todos"
+
+USER = [("user", pymongo.ASCENDING)]
+
+SHARED_INDEXES = [
+    pymongo.IndexModel([*USER, *SORT], name="user_end_date"),
+    pymongo.IndexModel(
+        [*USER, ("priority", pymongo.ASCENDING), *SORT],
+        name="user_priority_end_date",
+    ),
+    pymongo.IndexModel(
+        [*USER, ("done", pymongo.ASCENDING), *SORT], name="user_done_end_date"
+    ),
+    pymongo.IndexModel(
+        [*USER, ("updated_at", pymongo.ASCENDING)], name="user_updated_at"
+    ),
+    pymongo.IndexModel(
+        [*USER, ("done", pymongo.ASCENDING), *URGENCY], name="user_done_priority_rank"
+    ),
+]
+
+MIGRATIONS_COLLECTION = "shared.migrations"
+
+# Archived todos live next to the hot ones: "archive.<user>" per user, or one
+# collection tagged with the user in the shared layout
+ARCHIVE_PREFIX = "archive."
+SHARED_ARCHIVE = "shared.archive"
+
+DUPLICATE_KEY = 11000
+# Standalone servers (and very old ones) have no change streams
+CHANGE_STREAMS_UNSUPPORTED = {40573, 40324}
+
+WATCHED = ["insert", "update", "replace", "delete"]
+
+
+def to_document(todo: Todo) -> dict:
+    document = todo.to_document()
+    document["updated_at"] = todo.updated_at or utcnow()
+    document["priority_rank"] = priority_rank(todo.priority)
+    if todo.id:
+        document["_id"] = ObjectId(todo.id)
+    return document
+
+
+# Todos already done are left alone so their updated_at stays put
+NOT_DONE = {"done": {"$ne": True}}
+
+
+def mark_done_update() -> dict:
+    return {"$set": {"done": True, "updated_at": utcnow()}}
+
+
+def to_mongo_query(query: TodoFilter) -> dict:
+    mongo_query = {}
+
+    if query.priority:
+        mongo_query["priority"] = query.priority
+    if query.done is not None:
+        mongo_query["done"] = query.done
+    if query.after or query.before:
+        mongo_query["end_date"] = {}
+        if query.after:
+            mongo_query["end_date"]["$gte"] = query.after
+        if query.before:
+            mongo_query["end_date"]["$lt"] = query.before
+    if query.text:
+        mongo_query["todo"] = {"$regex": re.escape(query.text), "$options": "i"}
+    if query.updated_since:
+        mongo_query["updated_at"] = {"$gte": query.updated_since}
+
+    return mongo_query
+
+
+def to_keyset_query(after: tuple) -> dict:
+    """Match the todos sorted after ``(end_date, _id)``; nulls sort first."""
+    end_date, todo_id = after
+    todo_id = ObjectId(todo_id)
+
+    if end_date is None:
+        return {
+            "$or": [
+                {"end_date": {"$type": "date"}},
+                {"end_date": None, "_id": {"$gt": todo_id}},
+            ]
+        }
+    return {
+        "$or": [
+            {"end_date": {"$gt": end_date}},
+            {"end_date": end_date, "_id": {"$gt": todo_id}},
+        ]
+    }
+
+
+def to_changes(stream) -> Iterator[TodoChange]:
+    with stream:
+        for event in stream:
+            todo_id = str(event["documentKey"]["_id"])
+            # With updateLookup, a todo deleted since its update has no document
+            document = event.get("fullDocument")
+            if event["operationType"] == "delete" or document is None:
+                yield TodoChange("delete", todo_id)
+            else:
+                yield TodoChange("upsert", todo_id, Todo.from_document(document))
+
+
+def list_user_collections(database) -> list[str]:
+    return sorted(
+        name
+        for name in database.list_collection_names()
+        if not name.startswith(("system.", "shared.", ARCHIVE_PREFIX))
+    )
+
+
+def list_archive_collections(database) -> list[str]:
+    """The users with a per-user archive"""
+    return sorted(
+        name[len(ARCHIVE_PREFIX) :]
+        for name in database.list_collection_names()
+        if name.startswith(ARCHIVE_PREFIX)
+    )
+
+
+def insert_new(collection, documents: list[dict]) -> int:
+    """Insert documents, skipping the ids already there; returns how many were new"""
+    if not documents:
+        return 0
+    try:
+        return len(collection.insert_many(documents, ordered=False).inserted_ids)
+    except BulkWriteError as e:
+        if any(error["code"] != DUPLICATE_KEY for error in e.details["writeErrors"]):
+            raise
+        return e.details["nInserted"]
+
+
+def sync_to_shared(
+    source,
+    target,
+    user: str,
+    progress,
+    batch_size: int = 1000,
+    on_batch: Callable[[int], None] = None,
+) -> int:
+    """Bring ``user``'s todos in the shared ``target`` in line with ``source``.
+
+    New todos are copied in ``_id`` order and the last copied id is saved in
+    ``progress`` after every batch, so an interrupted run resumes where it
+    stopped. Later runs also catch up with the todos changed since the
+    previous one (by ``updated_at``) and with ids added or deleted out of
+    order. Returns how many todos were written or deleted.
+    """
+    # Keyed by the collection copied, which is the user for per-user todos
+    key = source.name
+    state = progress.find_one({"_id": key}) or {}
+    started = utcnow()
+    synced = 0
+
+    def tagged(documents) -> list[dict]:
+        return [{**document, "user": user} for document in documents]
+
+    query = {"_id": {"$gt": state["last_id"]}} if "last_id" in state else {}
+    cursor = source.find(query).sort("_id", pymongo.ASCENDING)
+    while batch := list(islice(cursor, batch_size)):
+        synced += insert_new(target, tagged(batch))
+        progress.update_one(
+            {"_id": key},
+            {
+                "$set": {"last_id": batch[-1]["_id"]},
+                "$setOnInsert": {"started_at": started},
+            },
+            upsert=True,
+        )
+        if on_batch:
+            on_batch(synced)
+
+    if state:
+        # Records written before runs were timed get one full refresh
+        since = state.get("synced_at", state.get("started_at"))
+        query = {"updated_at": {"$gte": since - CLOCK_SKEW}} if since else {}
+        changed = source.find(query)
+        while batch := list(islice(changed, batch_size)):
+            result = target.bulk_write(
+                [
+                    ReplaceOne({"_id": document["_id"]}, document, upsert=True)
+                    for document in tagged(batch)
+                ],
+                ordered=False,
+            )
+            synced += result.modified_count + result.upserted_count
+
+        source_ids = {document["_id"] for document in source.find({}, {"_id": 1})}
+        target_ids = {
+            document["_id"] for document in target.find({"user": user}, {"_id": 1})
+        }
+        missing = iter(sorted(source_ids - target_ids))
+        while ids := list(islice(missing, batch_size)):
+            synced += insert_new(target, tagged(source.find({"_id": {"$in": ids}})))
+        gone = iter(sorted(target_ids - source_ids))
+        while ids := list(islice(gone, batch_size)):
+            synced += target.delete_many({"_id": {"$in": ids}}).deleted_count
+        if on_batch:
+            on_batch(synced)
+
+    progress.update_one({"_id": key}, {"$set": {"synced_at": started}}, upsert=True)
+    return synced
+
+
+def migrate_to_shared(
+    database, batch_size: int = 1000, on_batch: Callable[[str, int], None] = None
+) -> dict[str, int]:
+    """Copy every per-user collection (and archive) into the shared layout.
+
+    Progress is saved in ``MIGRATIONS_COLLECTION``, so running it again
+    resumes an interrupted run and then catches up with the todos added,
+    changed or deleted since (see ``sync_to_shared``). Run it once more
+    after stopping writes, right before switching the layout. The per-user
+    collections are left untouched.
+    """
+    shared = database[SHARED_COLLECTION]
+    shared.create_indexes(SHARED_INDEXES)
+    archive = database[SHARED_ARCHIVE]
+    archive.create_indexes(SHARED_INDEXES)
+    progress = database[MIGRATIONS_COLLECTION]
+    synced = {}
+
+    for user in list_user_collections(database):
+        synced[user] = sync_to_shared(
+            database[user],
+            shared,
+            user,
+            progress,
+            batch_size,
+            partial(on_batch, user) if on_batch else None,
+        )
+    for user in list_archive_collections(database):
+        synced[user] = synced.get(user, 0) + sync_to_shared(
+            database[ARCHIVE_PREFIX + user],
+            archive,
+            user,
+            progress,
+            batch_size,
+            partial(on_batch, user) if on_batch else None,
+        )
+
+    return synced
+
+
+class MongoBackend(TodoBackend):
+    """Todos in the ``todo`` database, in one of two layouts.
+
+    "per-user" keeps one collection per user. "shared" keeps every user in
+    ``SHARED_COLLECTION`` with a ``user`` field that every query and index
+    leads with.
+
+    Only inserts can create a collection, so they are the ones that make sure
+    its indexes exist (once per process); reads never pay for it.
+    """
+
+    def __init__(
+        self,
+        uri: str,
+        database: str = "todo",
+        layout: str = "per-user",
+        settings: MongoSettings = None,
+    ):
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown mongo layout: {layout} (expected {LAYOUTS})")
+        self.client = create_client(uri, settings)
+        self.database = self.client[database]
+        self.shared = layout == "shared"
+        self.indexed_users = set()
+        self.indexed_archives = set()
+
+    def collection(self, user: str):
+        return self.database[SHARED_COLLECTION if self.shared else user]
+
+    def archive_collection(self, user: str):
+        return self.database[SHARED_ARCHIVE if self.shared else ARCHIVE_PREFIX + user]
+
+    def scoped(self, user: str, mongo_query: dict) -> dict:
+        return {"user": user, **mongo_query} if self.shared else mongo_query
+
+    def ensure_indexes(self, user: str) -> list[str]:
+        names = self.collection(user).create_indexes(
+            SHARED_INDEXES if self.shared else INDEXES
+        )
+        self.indexed_users.add(user)
+        return names
+
+    def writable(self, user: str):
+        if user not in self.indexed_users:
+            self.ensure_indexes(user)
+        return self.collection(user)
+
+    def to_document(self, user: str, todo: Todo) -> dict:
+        document = to_document(todo)
+        if self.shared:
+            document["user"] = user
+        return document
+
+    def list_users(self) -> list[str]:
+        if self.shared:
+            return sorted(self.collection(None).distinct("user"))
+        return list_user_collections(self.database)
+
+    def add(self, user: str, todo: Todo) -> str:
+        result = self.writable(user).insert_one(self.to_document(user, todo))
+        return str(result.inserted_id)
+
+    def add_many(self, user: str, todos: list[Todo]) -> tuple[int, dict]:
+        try:
+            result = self.writable(user).insert_many(
+                [self.to_document(user, todo) for todo in todos], ordered=False
+            )
+            return len(result.inserted_ids), {}
+        except BulkWriteError as e:
+            # A client supplied id that already exists is a replayed insert
+            replayed = {
+                error["index"]
+                for error in e.details["writeErrors"]
+                if error["code"] == DUPLICATE_KEY and todos[error["index"]].id
+            }
+            errors = {
+                error["index"]: error["errmsg"]
+                for error in e.details["writeErrors"]
+                if error["index"] not in replayed
+            }
+            return e.details["nInserted"] + len(replayed), errors
+
+    def delete(self, user: str, todo_id: str) -> int:
+        result = self.collection(user).delete_one(
+            self.scoped(user, {"_id": ObjectId(todo_id)})
+        )
+        return result.deleted_count
+
+    def delete_many(self, user: str, todo_ids: list[str]) -> list[str]:
+        matched = self.matching_ids(user, todo_ids)
+        if matched:
+            self.collection(user).delete_many({"_id": {"$in": matched}})
+        return [str(todo_id) for todo_id in matched]
+
+    def mark_done(self, user: str, todo_id: str) -> int:
+        result = self.collection(user).update_one(
+            self.scoped(user, {"_id": ObjectId(todo_id), **NOT_DONE}),
+            mark_done_update(),
+        )
+        return result.modified_count
+
+    def mark_done_many(self, user: str, todo_ids: list[str]) -> list[str]:
+        matched = self.matching_ids(user, todo_ids)
+        if matched:
+            self.collection(user).update_many(
+                {"_id": {"$in": matched}, **NOT_DONE}, mark_done_update()
+            )
+        return [str(todo_id) for todo_id in matched]
+
+    def matching_ids(self, user: str, todo_ids: list[str]) -> list[ObjectId]:
+        object_ids = [ObjectId(i) for i in todo_ids if ObjectId.is_valid(i)]
+        if not object_ids:
+            return []
+        cursor = self.collection(user).find(
+            self.scoped(user, {"_id": {"$in": object_ids}}), {"_id": 1}
+        )
+        return [document["_id"] for document in cursor]
+
+    def cursor(
+        self,
+        user: str,
+        query: TodoFilter = TodoFilter(),
+        sort: bool = False,
+        limit: int = None,
+        after: tuple = None,
+        fields: tuple = None,
+        archived: bool = False,
+    ):
+        mongo_query = to_mongo_query(query)
+        if after:
+            mongo_query = {"$and": [mongo_query, to_keyset_query(after)]}
+
+        collection = (
+            self.archive_collection(user) if archived else self.collection(user)
+        )
+        cursor = collection.find(self.scoped(user, mongo_query), projection(fields))
+
+        if sort or after:
+            cursor = cursor.sort(SORT)
+        if limit:
+            cursor = cursor.limit(limit).batch_size(limit)
+
+        return cursor
+
+    def find(
+        self,
+        user: str,
+        query: TodoFilter = TodoFilter(),
+        sort: bool = False,
+        limit: int = None,
+        after: tuple = None,
+        fields: tuple = None,
+    ):
+        cursor = self.cursor(user, query, sort, limit, after, fields)
+        return map(Todo.from_document, cursor)
+
+    def most_urgent(self, user: str, limit: int, fields: tuple = None):
+        cursor = (
+            self.collection(user)
+            .find(self.scoped(user, {"done": False}), projection(fields))
+            .sort(URGENCY)
+            .limit(limit)
+        )
+        return map(Todo.from_document, cursor)
+
+    def backfill_ranks(self, user: str) -> int:
+        return sum(
+            self.collection(user)
+            .update_many(
+                self.scoped(user, {"priority": name, "priority_rank": {"$ne": rank}}),
+                {"$set": {"priority_rank": rank}},
+            )
+            .modified_count
+            for name, rank in PRIORITY_RANKS.items()
+        )
+
+    def explain(
+        self, user: str, query: TodoFilter = TodoFilter(), sort: bool = False
+    ) -> dict:
+        explain = self.cursor(user, query, sort).explain()
+        return explain["queryPlanner"]["winningPlan"]
+
+    def count(self, user: str, query: TodoFilter = TodoFilter()) -> int:
+        return self.collection(user).count_documents(
+            self.scoped(user, to_mongo_query(query))
+        )
+
+    def stats(self, user: str, query: TodoFilter, today: datetime) -> dict:
+        overdue = {
+            "$and": [
+                {"$eq": ["$done", False]},
+                {"$gt": ["$end_date", None]},
+                {"$lt": ["$end_date", today]},
+            ]
+        }
+        groups = self.collection(user).aggregate(
+            [
+                {"$match": self.scoped(user, to_mongo_query(query))},
+                {
+                    "$group": {
+                        "_id": "$priority",
+                        "total": {"$sum": 1},
+                        "done": {"$sum": {"$cond": ["$done", 1, 0]}},
+                        "overdue": {"$sum": {"$cond": [overdue, 1, 0]}},
+                    }
+                },
+            ]
+        )
+        return merge_stats(
+            (group["_id"], group["total"], group["done"], group["overdue"])
+            for group in groups
+        )
+
+    def agenda(self, user: str, query: TodoFilter, per_day: int) -> list[AgendaDay]:
+        mongo_query = to_mongo_query(query)
+        mongo_query.setdefault("end_date", {})["$type"] = "date"
+        # End dates are whole days, so grouping on them groups by day
+        days = self.collection(user).aggregate(
+            [
+                {"$match": self.scoped(user, mongo_query)},
+                {"$sort": dict(SORT)},
+                {
+                    "$group": {
+                        "_id": "$end_date",
+                        "total": {"$sum": 1},
+                        "todos": {
+                            "$push": {
+                                "_id": "$_id",
+                                "todo": "$todo",
+                                "priority": "$priority",
+                                "end_date": "$end_date",
+                                "done": "$done",
+                            }
+                        },
+                    }
+                },
+                {"$project": {"total": 1, "todos": {"$slice": ["$todos", per_day]}}},
+                {"$sort": {"_id": pymongo.ASCENDING}},
+            ]
+        )
+        return [
+            AgendaDay(
+                day["_id"], day["total"], list(map(Todo.from_document, day["todos"]))
+            )
+            for day in days
+        ]
+
+    def delete_where(self, user: str, query: TodoFilter) -> int:
+        result = self.collection(user).delete_many(
+            self.scoped(user, to_mongo_query(query))
+        )
+        return result.deleted_count
+
+    def mark_done_where(self, user: str, query: TodoFilter) -> int:
+        result = self.collection(user).update_many(
+            self.scoped(user, {"$and": [to_mongo_query(query), NOT_DONE]}),
+            mark_done_update(),
+        )
+        return result.modified_count
+
+    def watch(self, user: str) -> Iterator[TodoChange]:
+        match = {"operationType": {"$in": WATCHED}}
+        if self.shared:
+            # Delete events only carry the _id, the caller skips unknown ones
+            match = {
+                **match,
+                "$or": [{"fullDocument.user": user}, {"operationType": "delete"}],
+            }
+        try:
+            stream = self.collection(user).watch(
+                [{"$match": match}], full_document="updateLookup"
+            )
+        except OperationFailure as e:
+            if e.code in CHANGE_STREAMS_UNSUPPORTED:
+                return None
+            raise
+        return to_changes(stream)
+
+    def archive(
+        self,
+        user: str,
+        before: datetime,
+        batch_size: int = 1000,
+        on_batch: Callable[[int], None] = None,
+    ) -> int:
+        # Copy then delete: a batch interrupted in between is copied again
+        # (duplicates are skipped) and deleted by the next run.
+        archive = self.archive_collection(user)
+        if user not in self.indexed_archives:
+            archive.create_indexes(SHARED_INDEXES if self.shared else INDEXES)
+            self.indexed_archives.add(user)
+        query = self.scoped(
+            user,
+            {
+                "done": True,
+                "$or": [{"updated_at": {"$lt": before}}, {"updated_at": None}],
+            },
+        )
+
+        archived = 0
+        while batch := list(self.collection(user).find(query).limit(batch_size)):
+            insert_new(archive, batch)
+            self.collection(user).delete_many(
+                {"_id": {"$in": [document["_id"] for document in batch]}}
+            )
+            archived += len(batch)
+            if on_batch:
+                on_batch(archived)
+            if len(batch) < batch_size:
+                break
+        return archived
+
+    def find_archived(
+        self,
+        user: str,
+        query: TodoFilter = TodoFilter(),
+        sort: bool = False,
+        limit: int = None,
+        after: tuple = None,
+        fields: tuple = None,
+    ):
+        cursor = self.cursor(user, query, sort, limit, after, fields, archived=True)
+        return map(Todo.from_document, cursor)
+
+    def count_archived(self, user: str, query: TodoFilter = TodoFilter()) -> int:
+        return self.archive_collection(user).count_documents(
+            self.scoped(user, to_mongo_query(query))
+        )
+
+    def drop_user(self, user: str) -> None:
+        if self.shared:
+            self.collection(user).delete_many({"user": user})
+            self.archive_collection(user).delete_many({"user": user})
+        else:
+            self.collection(user).drop()
+            self.archive_collection(user).drop()
+            self.indexed_users.discard(user)
+        self.indexed_archives.discard(user)
+
+    def close(self) -> None:
+        self.client.close()
@@ -0,0 +1,110 @@
+from dataclasses import dataclass, field, fields
+
+COMPRESSORS = ["zstd", "snappy", "zlib"]
+READ_PREFERENCES = [
+    "primary",
+    "primaryPreferred",
+    "secondary",
+    "secondaryPreferred",
+    "nearest",
+]
+WRITE_CONCERN_OPTIONS = {"w": "w", "journal": "journal", "wtimeout_ms": "wTimeoutMS"}
+
+
+def option(name: str):
+    return field(default=None, metadata={"option": name})
+
+
+@dataclass(frozen=True)
+class MongoSettings:
+    """Client options from the "mongo" section of secrets.json.
+
+    Every key is optional, the driver default (or the value in the URI)
+    applies to the ones left out. Compressors are offered in order and the
+    server picks the first it supports.
+    """
+
+    compressors: list = option("compressors")
+    zlib_level: int = option("zlibCompressionLevel")
+    min_pool_size: int = option("minPoolSize")
+    max_pool_size: int = option("maxPoolSize")
+    max_idle_ms: int = option("maxIdleTimeMS")
+    connect_timeout_ms: int = option("connectTimeoutMS")
+    server_selection_timeout_ms: int = option("serverSelectionTimeoutMS")
+    socket_timeout_ms: int = option("socketTimeoutMS")
+    timeout_ms: int = option("timeoutMS")
+    read_preference: str = option("readPreference")
+    # {"w": 1 or "majority", "journal": bool, "wtimeout_ms": int}
+    write_concern: dict = None
+
+    def __post_init__(self):
+        for setting in fields(self):
+            value = getattr(self, setting.name)
+            if value is None:
+                continue
+            # bool is an int subclass, but never a valid size or timeout
+            if not isinstance(value, setting.type) or isinstance(value, bool):
+                raise ValueError(
+                    f"Invalid mongo.{setting.name}: {value!r} "
+                    f"(expected {setting.type.__name__})"
+                )
+            if setting.type is int and value < 0 and setting.name != "zlib_level":
+                raise ValueError(f"Invalid mongo.{setting.name}: {value}")
+
+        if self.compressors and not set(self.compressors) <= set(COMPRESSORS):
+            raise ValueError(
+                f"Unknown mongo.compressors: {self.compressors} "
+                f"(expected {COMPRESSORS})"
+            )
+        if self.zlib_level is not None and not -1 <= self.zlib_level <= 9:
+            raise ValueError(f"Invalid mongo.zlib_level: {self.zlib_level} (-1 to 9)")
+        if self.read_preference and self.read_preference not in READ_PREFERENCES:
+            raise ValueError(
+                f"Unknown mongo.read_preference: {self.read_preference} "
+                f"(expected {READ_PREFERENCES})"
+            )
+        if self.write_concern and not set(self.write_concern) <= set(
+            WRITE_CONCERN_OPTIONS
+        ):
+            raise ValueError(
+                f"Unknown mongo.write_concern keys: {list(self.write_concern)} "
+                f"(expected {list(WRITE_CONCERN_OPTIONS)})"
+            )
+
+    @classmethod
+    def from_config(cls, config: dict) -> "MongoSettings":
+        section = config.get("mongo") or {}
+        known = {setting.name for setting in fields(cls)}
+        unknown = sorted(set(section) - known)
+        if unknown:
+            raise ValueError(
+                f"Unknown mongo settings: {unknown} (expected {sorted(known)})"
+            )
+        return cls(**section)
+
+    def client_options(self) -> dict:
+        """Keyword arguments for ``MongoClient``"""
+        options = {}
+        for setting in fields(self):
+            value = getattr(self, setting.name)
+            if value is None or "option" not in setting.metadata:
+                continue
+            if setting.name == "compressors":
+                value = ",".join(value)
+            options[setting.metadata["option"]] = value
+        for key, value in (self.write_concern or {}).items():
+            options[WRITE_CONCERN_OPTIONS[key]] = value
+        return options
+
+
+def create_client(uri: str, settings: MongoSettings = None):
+    """Build a client with the configured options, for every entry point"""
+    import pymongo
+
+    return pymongo.MongoClient(uri, **(settings or MongoSettings()).client_options())
+
+
+def client_from_config(config: dict):
+    if "mongo_uri" not in config:
+        raise ValueError("Missing 'mongo_uri' in secrets.json")
+    return create_client(config["mongo_uri"], MongoSettings.from_config(config))
@@ -0,0 +1,428 @@
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from itertools import groupby
+from typing import Callable
+from bson.objectid import ObjectId
+
+from todo.src.model import ALL_FIELDS, PRIORITY_RANKS, Todo, priority_rank, utcnow
+from .base import AgendaDay, TodoBackend, TodoFilter, merge_stats
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS todos (
+    id TEXT PRIMARY KEY,
+    user TEXT NOT NULL,
+    todo TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    end_date TEXT,
+    done INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT,
+    priority_rank INTEGER
+);
+CREATE INDEX IF NOT EXISTS todos_user_end_date
+    ON todos (user, end_date, id);
+CREATE INDEX IF NOT EXISTS todos_user_priority_end_date
+    ON todos (user, priority, end_date, id);
+CREATE INDEX IF NOT EXISTS todos_user_done_end_date
+    ON todos (user, done, end_date, id);
+CREATE INDEX IF NOT EXISTS todos_user_updated_at
+    ON todos (user, updated_at);
+CREATE INDEX IF NOT EXISTS todos_user_done_priority_rank
+    ON todos (user, done, priority_rank DESC, end_date, id);
+CREATE TABLE IF NOT EXISTS archived_todos (
+    id TEXT PRIMARY KEY,
+    user TEXT NOT NULL,
+    todo TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    end_date TEXT,
+    done INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT,
+    priority_rank INTEGER
+);
+CREATE INDEX IF NOT EXISTS archived_todos_user_end_date
+    ON archived_todos (user, end_date, id);
+"""
+
+MAX_PARAMETERS = 500
+
+COLUMNS = "id, todo, priority, end_date, done, updated_at"
+# Client supplied ids (see the journal) may be replayed, keep the first insert
+INSERT = (
+    f"INSERT INTO todos ({COLUMNS}, priority_rank, user)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+    " ON CONFLICT (id) DO NOTHING"
+)
+
+
+def to_sqlite_date(dt: datetime) -> str:
+    return dt.isoformat() if dt else None
+
+
+def from_sqlite_date(value: str) -> datetime:
+    return datetime.fromisoformat(value) if value else None
+
+
+def to_where(user: str, query: TodoFilter) -> tuple[str, list]:
+    where = "WHERE user = ?"
+    params = [user]
+
+    if query.priority:
+        where += " AND priority = ?"
+        params.append(query.priority)
+    if query.done is not None:
+        where += " AND done = ?"
+        params.append(int(query.done))
+    if query.after:
+        where += " AND end_date >= ?"
+        params.append(to_sqlite_date(query.after))
+    if query.before:
+        where += " AND end_date < ?"
+        params.append(to_sqlite_date(query.before))
+    if query.text:
+        where += " AND todo LIKE ? ESCAPE '\\'"
+        escaped = re.sub(r"([\\%_])", r"\\\1", query.text)
+        params.append(f"%{escaped}%")
+    if query.updated_since:
+        where += " AND updated_at >= ?"
+        params.append(to_sqlite_date(query.updated_since))
+
+    return where, params
+
+
+def to_columns(fields: tuple = None) -> str:
+    # Fields left out are selected as NULL so rows keep one positional shape
+    if not fields:
+        return COLUMNS
+    return ", ".join(["id", *(f if f in fields else "NULL" for f in ALL_FIELDS)])
+
+
+def to_select(
+    user: str,
+    query: TodoFilter,
+    sort: bool = False,
+    limit: int = None,
+    after: tuple = None,
+    fields: tuple = None,
+    table: str = "todos",
+) -> tuple[str, list]:
+    where, params = to_where(user, query)
+    sql = f"SELECT {to_columns(fields)} FROM {table} {where}"
+
+    if after:
+        end_date, todo_id = after
+        if end_date is None:
+            sql += " AND (end_date IS NOT NULL OR (end_date IS NULL AND id > ?))"
+            params.append(str(ObjectId(todo_id)))
+        else:
+            sql += " AND (end_date > ? OR (end_date = ? AND id > ?))"
+            params += [to_sqlite_date(end_date)] * 2 + [str(ObjectId(todo_id))]
+    if sort or after:
+        sql += " ORDER BY end_date, id"
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+
+    return sql, params
+
+
+def to_row(user: str, todo: Todo) -> tuple:
+    return (
+        todo.id.lower() if todo.id else str(ObjectId()),
+        todo.todo,
+        todo.priority,
+        to_sqlite_date(todo.end_date),
+        int(todo.done),
+        to_sqlite_date(todo.updated_at or utcnow()),
+        priority_rank(todo.priority),
+        user,
+    )
+
+
+BACKFILL_RANKS = (
+    "UPDATE todos SET priority_rank = CASE priority "
+    + " ".join(f"WHEN '{name}' THEN {rank}" for name, rank in PRIORITY_RANKS.items())
+    + " ELSE 0 END WHERE priority_rank IS NULL"
+)
+
+
+def to_todo(row) -> Todo:
+    return Todo(
+        row[0],
+        row[1],
+        row[2],
+        from_sqlite_date(row[3]),
+        bool(row[4]) if row[4] is not None else None,
+        from_sqlite_date(row[5]),
+    )
+
+
+class SqliteBackend(TodoBackend):
+    """All users in a single embedded table, indexed on the listing columns.
+
+    Ids are generated as ObjectIds so they look and validate the same as the
+    ones handed out by the Mongo backend. The connection may be shared by
+    threads; writes hold ``lock`` so they never land inside another thread's
+    transaction.
+    """
+
+    def __init__(self, path: str = "todo.db"):
+        self.connection = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False
+        )
+        self.upgrade()
+        self.connection.executescript(SCHEMA)
+        self.lock = threading.RLock()
+
+    def upgrade(self) -> None:
+        """Add the columns that databases created by older versions lack"""
+        columns = {
+            row[1] for row in self.connection.execute("PRAGMA table_info(todos)")
+        }
+        if columns and "updated_at" not in columns:
+            self.connection.execute("ALTER TABLE todos ADD COLUMN updated_at TEXT")
+        if columns and "priority_rank" not in columns:
+            with self.connection:
+                self.connection.execute("BEGIN")
+                self.connection.execute(
+                    "ALTER TABLE todos ADD COLUMN priority_rank INTEGER"
+                )
+                self.connection.execute(BACKFILL_RANKS)
+
+    def ensure_indexes(self, user: str) -> list[str]:
+        self.connection.executescript(SCHEMA)
+        indexes = self.connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+        )
+        return [row[0] for row in indexes]
+
+    def list_users(self) -> list[str]:
+        return [
+            row[0]
+            for row in self.connection.execute(
+                "SELECT DISTINCT user FROM todos ORDER BY user"
+            )
+        ]
+
+    def add(self, user: str, todo: Todo) -> str:
+        row = to_row(user, todo)
+        with self.lock:
+            self.connection.execute(INSERT, row)
+        return row[0]
+
+    def add_many(self, user: str, todos: list[Todo]) -> tuple[int, dict]:
+        with self.lock, self.connection:
+            self.connection.execute("BEGIN")
+            self.connection.executemany(INSERT, (to_row(user, todo) for todo in todos))
+        return len(todos), {}
+
+    def delete(self, user: str, todo_id: str) -> int:
+        with self.lock:
+            cursor = self.connection.execute(
+                "DELETE FROM todos WHERE user = ? AND id = ?",
+                (user, str(ObjectId(todo_id))),
+            )
+        return cursor.rowcount
+
+    def delete_many(self, user: str, todo_ids: list[str]) -> list[str]:
+        return self.update_ids(user, todo_ids, "DELETE FROM todos")
+
+    def mark_done(self, user: str, todo_id: str) -> int:
+        with self.lock:
+            cursor = self.connection.execute(
+                "UPDATE todos SET done = 1, updated_at = ?"
+                " WHERE user = ? AND id = ? AND done = 0",
+                (to_sqlite_date(utcnow()), user, str(ObjectId(todo_id))),
+            )
+        return cursor.rowcount
+
+    def mark_done_many(self, user: str, todo_ids: list[str]) -> list[str]:
+        return self.update_ids(
+            user,
+            todo_ids,
+            "UPDATE todos SET done = 1, updated_at = ?",
+            [to_sqlite_date(utcnow())],
+            " AND done = 0",
+        )
+
+    def update_ids(
+        self,
+        user: str,
+        todo_ids: list[str],
+        statement: str,
+        values: list = (),
+        condition: str = "",
+    ) -> list[str]:
+        todo_ids = [todo_id.lower() for todo_id in todo_ids]
+        matched = []
+        with self.lock, self.connection:
+            self.connection.execute("BEGIN")
+            for start in range(0, len(todo_ids), MAX_PARAMETERS):
+                chunk = todo_ids[start : start + MAX_PARAMETERS]
+                # "+user" keeps the planner on the primary key, the user
+                # indexes would scan every row of the user instead
+                where = f"WHERE +user = ? AND id IN ({', '.join('?' * len(chunk))})"
+                params = [user, *chunk]
+                matched += [
+                    row[0]
+                    for row in self.connection.execute(
+                        f"SELECT id FROM todos {where}", params
+                    )
+                ]
+                self.connection.execute(
+                    f"{statement} {where}{condition}", [*values, *params]
+                )
+        return matched
+
+    def find(
+        self,
+        user: str,
+        query: TodoFilter = TodoFilter(),
+        sort: bool = False,
+        limit: int = None,
+        after: tuple = None,
+        fields: tuple = None,
+    ):
+        sql, params = to_select(user, query, sort, limit, after, fields)
+        return map(to_todo, self.connection.execute(sql, params))
+
+    def most_urgent(self, user: str, limit: int, fields: tuple = None):
+        return map(
+            to_todo,
+            self.connection.execute(
+                f"SELECT {to_columns(fields)} FROM todos"
+                " WHERE user = ? AND done = 0"
+                " ORDER BY priority_rank DESC, end_date, id LIMIT ?",
+                (user, limit),
+            ),
+        )
+
+    def backfill_ranks(self, user: str) -> int:
+        with self.lock:
+            return self.connection.execute(
+                f"{BACKFILL_RANKS} AND user = ?", (user,)
+            ).rowcount
+
+    def explain(
+        self, user: str, query: TodoFilter = TodoFilter(), sort: bool = False
+    ) -> dict:
+        sql, params = to_select(user, query, sort)
+        plan = self.connection.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return {"sql": sql, "plan": [row[3] for row in plan]}
+
+    def count(self, user: str, query: TodoFilter = TodoFilter()) -> int:
+        return self.count_in("todos", user, query)
+
+    def count_in(self, table: str, user: str, query: TodoFilter) -> int:
+        where, params = to_where(user, query)
+        return self.connection.execute(
+            f"SELECT COUNT(*) FROM {table} {where}", params
+        ).fetchone()[0]
+
+    def archive(
+        self,
+        user: str,
+        before: datetime,
+        batch_size: int = 1000,
+        on_batch: Callable[[int], None] = None,
+    ) -> int:
+        archived = 0
+        while True:
+            with self.lock, self.connection:
+                self.connection.execute("BEGIN")
+                ids = [
+                    row[0]
+                    for row in self.connection.execute(
+                        "SELECT id FROM todos WHERE user = ? AND done = 1"
+                        " AND (updated_at < ? OR updated_at IS NULL) LIMIT ?",
+                        (user, to_sqlite_date(before), batch_size),
+                    )
+                ]
+                if ids:
+                    where = f"WHERE id IN ({', '.join('?' * len(ids))})"
+                    self.connection.execute(
+                        f"INSERT INTO archived_todos ({COLUMNS}, priority_rank, user)"
+                        f" SELECT {COLUMNS}, priority_rank, user FROM todos {where}"
+                        " ON CONFLICT (id) DO NOTHING",
+                        ids,
+                    )
+                    self.connection.execute(f"DELETE FROM todos {where}", ids)
+            archived += len(ids)
+            if on_batch and ids:
+                on_batch(archived)
+            if len(ids) < batch_size:
+                return archived
+
+    def find_archived(
+        self,
+        user: str,
+        query: TodoFilter = TodoFilter(),
+        sort: bool = False,
+        limit: int = None,
+        after: tuple = None,
+        fields: tuple = None,
+    ):
+        sql, params = to_select(
+            user, query, sort, limit, after, fields, "archived_todos"
+        )
+        return map(to_todo, self.connection.execute(sql, params))
+
+    def count_archived(self, user: str, query: TodoFilter = TodoFilter()) -> int:
+        return self.count_in("archived_todos", user, query)
+
+    def stats(self, user: str, query: TodoFilter, today: datetime) -> dict:
+        where, params = to_where(user, query)
+        return merge_stats(
+            self.connection.execute(
+                "SELECT priority, COUNT(*), SUM(done),"
+                " COUNT(CASE WHEN done = 0 AND end_date < ? THEN 1 END)"
+                f" FROM todos {where} GROUP BY priority",
+                [to_sqlite_date(today), *params],
+            )
+        )
+
+    def agenda(self, user: str, query: TodoFilter, per_day: int) -> list[AgendaDay]:
+        where, params = to_where(user, query)
+        rows = self.connection.execute(
+            f"SELECT {COLUMNS}, total FROM ("
+            f" SELECT {COLUMNS},"
+            " COUNT(*) OVER (PARTITION BY end_date) AS total,"
+            " ROW_NUMBER() OVER (PARTITION BY end_date ORDER BY id) AS position"
+            f" FROM todos {where} AND end_date IS NOT NULL"
+            ") WHERE position <= ? ORDER BY end_date, id",
+            [*params, per_day],
+        )
+        days = []
+        for end_date, group in groupby(rows, key=lambda row: row[3]):
+            group = list(group)
+            days.append(
+                AgendaDay(
+                    from_sqlite_date(end_date), group[0][6], list(map(to_todo, group))
+                )
+            )
+        return days
+
+    def delete_where(self, user: str, query: TodoFilter) -> int:
+        where, params = to_where(user, query)
+        with self.lock:
+            return self.connection.execute(
+                f"DELETE FROM todos {where}", params
+            ).rowcount
+
+    def mark_done_where(self, user: str, query: TodoFilter) -> int:
+        where, params = to_where(user, query)
+        with self.lock:
+            return self.connection.execute(
+                f"UPDATE todos SET done = 1, updated_at = ? {where} AND done = 0",
+                [to_sqlite_date(utcnow()), *params],
+            ).rowcount
+
+    def drop_user(self, user: str) -> None:
+        with self.lock:
+            self.connection.execute("DELETE FROM todos WHERE user = ?", (user,))
+            self.connection.execute(
+                "DELETE FROM archived_todos WHERE user = ?", (user,)
+            )
+
+    def close(self) -> None:
+        self.connection.close()
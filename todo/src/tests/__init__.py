@@ -0,0 +1,28 @@
+import os
+import time
+
+from todo.src.storage.sqlite import SqliteBackend
+
+# Run the suite against the embedded engine unless a backend is chosen
+# explicitly (e.g. TODO_BACKEND=mongo to test against a live cluster).
+os.environ.setdefault("TODO_BACKEND", "sqlite")
+os.environ.setdefault("TODO_SQLITE_PATH", ":memory:")
+# Ignore a secrets.json in the working directory (its journal or cache section
+# would change what the tests see); point TODO_SECRETS at one to use it.
+os.environ.setdefault(
+    "TODO_SECRETS", os.path.join(os.path.dirname(__file__), "no-secrets.json")
+)
+
+LATENCY = 0.02
+
+
+class SlowBackend(SqliteBackend):
+    """Sleeps on reads like a network round trip would, without holding the GIL"""
+
+    def find(self, *args, **kwargs):
+        time.sleep(LATENCY)
+        return super().find(*args, **kwargs)
+
+    def stats(self, *args, **kwargs):
+        time.sleep(LATENCY)
+        return super().stats(*args, **kwargs)
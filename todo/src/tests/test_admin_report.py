@@ -0,0 +1,51 @@
+import random
+import string
+import time
+import unittest
+
+from todo.src.app import add_todo, mark_as_done, user_report
+from todo.src.storage import set_backend
+from todo.src.tests import LATENCY, SlowBackend
+
+
+def get_random_string(length):
+    letters = string.ascii_lowercase
+    return "".join(random.choice(letters) for i in range(length))
+
+
+class TestAdminReport(unittest.TestCase):
+    def setUp(self):
+        set_backend(SlowBackend(":memory:"))
+        self.users = sorted(get_random_string(10) for _ in range(16))
+        for count, user in enumerate(self.users, 1):
+            for _ in range(count):
+                add_todo(user, "test", "low", "2000-01-01")
+
+    def tearDown(self):
+        set_backend(None)
+
+    def test_every_user_is_reported(self):
+        mark_as_done(self.users[0], add_todo(self.users[0], "done", "high"))
+
+        report = user_report()
+
+        self.assertEqual(list(report), self.users)
+        self.assertEqual(report[self.users[0]]["total"], 2)
+        self.assertEqual(report[self.users[0]]["done"], 1)
+        self.assertEqual(report[self.users[0]]["overdue"], 1)
+        self.assertEqual(report[self.users[-1]]["open"], 16)
+
+    def test_given_users_only(self):
+        report = user_report([self.users[1].upper()])
+        self.assertEqual(list(report), [self.users[1]])
+
+    def test_users_are_aggregated_concurrently(self):
+        start = time.perf_counter()
+        user_report(workers=8)
+        elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, LATENCY * len(self.users) / 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import os
+import random
+import string
+import tempfile
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from todo.src.app import (
+    add_todo,
+    archive_todos,
+    auto_archive,
+    count_archived,
+    drop_user_collection,
+    list_pages,
+    list_todos,
+    mark_as_done,
+)
+from todo.src.model import utcnow
+from todo.src.storage import TodoFilter, get_backend
+
+
+def get_random_string(length):
+    letters = string.ascii_lowercase
+    return "".join(random.choice(letters) for i in range(length))
+
+
+class TestArchiveTodos(unittest.TestCase):
+    def setUp(self):
+        self.user = get_random_string(20)
+        self.done = []
+        for i in range(5):
+            todo_id = add_todo(self.user, f"done{i}", "low", f"2022-01-0{i + 1}")
+            mark_as_done(self.user, todo_id)
+            self.done.append(todo_id)
+        add_todo(self.user, "open", "high", "2022-01-03")
+        add_todo(self.user, "someday", "low")
+
+    def tearDown(self):
+        drop_user_collection(self.user)
+
+    def archive_all_done(self, batch_size: int = 1000, on_batch=None) -> int:
+        # Everything done before tomorrow counts as old
+        before = utcnow() + timedelta(days=1)
+        return get_backend().archive(self.user, before, batch_size, on_batch)
+
+    def test_moves_done_todos_in_batches(self):
+        batches = []
+        self.assertEqual(self.archive_all_done(2, batches.append), 5)
+
+        self.assertEqual(batches, [2, 4, 5])
+        self.assertEqual(
+            sorted(todo.todo for todo in list_todos(self.user)), ["open", "someday"]
+        )
+        self.assertEqual(count_archived(self.user), 5)
+        self.assertEqual(count_archived(self.user, TodoFilter(text="done1")), 1)
+
+    def test_recent_and_open_todos_stay(self):
+        self.assertEqual(archive_todos(self.user, "30d"), 0)
+        self.assertEqual(len(list(list_todos(self.user))), 7)
+        self.assertEqual(count_archived(self.user), 0)
+
+    def test_invalid_duration(self):
+        with self.assertRaises(ValueError):
+            archive_todos(self.user, "a month")
+
+    def test_invalid_batch_size(self):
+        for batch_size in [0, -1]:
+            with self.subTest(batch_size=batch_size), self.assertRaises(ValueError):
+                archive_todos(self.user, "0d", batch_size)
+
+    def test_include_archived_keeps_the_sort_order(self):
+        self.archive_all_done()
+
+        todos = list(list_todos(self.user, True, include_archived=True))
+        self.assertEqual(
+            [todo.todo for todo in todos],
+            ["someday", "done0", "done1", "done2", "open", "done3", "done4"],
+        )
+        self.assertEqual(len(list(list_todos(self.user, limit=3))), 2)
+        self.assertEqual(
+            len(list(list_todos(self.user, limit=3, include_archived=True))), 3
+        )
+
+    def test_include_archived_pages(self):
+        self.archive_all_done()
+
+        pages = list(list_pages(self.user, True, page_size=3, include_archived=True))
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(pages[1][0].todo, "done2")
+
+    def test_drop_user_clears_the_archive(self):
+        self.archive_all_done()
+        drop_user_collection(self.user)
+        self.assertEqual(count_archived(self.user), 0)
+
+
+class TestAutoArchive(unittest.TestCase):
+    def setUp(self):
+        self.user = get_random_string(20)
+        mark_as_done(self.user, add_todo(self.user, "done", "low"))
+        self.stamps = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        drop_user_collection(self.user)
+        self.stamps.cleanup()
+
+    def settings(self, **settings):
+        return mock.patch(
+            "todo.src.app.archive_settings",
+            return_value={"stamps": self.stamps.name, **settings},
+        )
+
+    def test_off_by_default(self):
+        with self.settings():
+            self.assertEqual(auto_archive(self.user), 0)
+
+    def test_runs_once_a_day(self):
+        before = utcnow() + timedelta(days=1)
+        with self.settings(auto=True), mock.patch(
+            "todo.src.app.utcnow", return_value=before + timedelta(days=30)
+        ):
+            self.assertEqual(auto_archive(self.user), 1)
+            mark_as_done(self.user, add_todo(self.user, "done too", "low"))
+            self.assertEqual(auto_archive(self.user), 0)
+
+        self.assertEqual(count_archived(self.user), 1)
+
+    def test_stamps_stay_in_their_directory(self):
+        victim = os.path.join(self.stamps.name, "victim")
+        with open(victim, "w") as f:
+            f.write("keep")
+        stamps = os.path.join(self.stamps.name, "stamps")
+
+        with self.settings(auto=True, stamps=stamps):
+            for user in ["../victim", "team/alice"]:
+                auto_archive(user)
+
+        with open(victim) as f:
+            self.assertEqual(f.read(), "keep")
+        self.assertEqual(len(os.listdir(stamps)), 2)
+
+    def test_unwritable_stamp_does_not_fail(self):
+        # A file where the stamp directory should be
+        stamps = os.path.join(self.stamps.name, "file")
+        open(stamps, "w").close()
+
+        with self.settings(auto=True, stamps=stamps):
+            self.assertEqual(auto_archive(self.user), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
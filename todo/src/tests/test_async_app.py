@@ -0,0 +1,66 @@
+import asyncio
+import random
+import string
+import time
+import unittest
+
+from todo.src import AsyncTodoApp, add_todo
+from todo.src.storage import set_backend
+from todo.src.tests import LATENCY, SlowBackend
+
+
+def get_random_string(length):
+    letters = string.ascii_lowercase
+    return "".join(random.choice(letters) for i in range(length))
+
+
+class TestAsyncTodoApp(unittest.TestCase):
+    def setUp(self):
+        set_backend(SlowBackend(":memory:"))
+        self.users = [get_random_string(10) for _ in range(16)]
+        for user in self.users:
+            add_todo(user, f"todo for {user}", "low")
+
+    def tearDown(self):
+        set_backend(None)
+
+    def list_many(self, max_workers: int) -> tuple[dict, float]:
+        async def run():
+            async with AsyncTodoApp(max_workers) as app:
+                return await app.list_many(self.users)
+
+        start = time.perf_counter()
+        listings = asyncio.run(run())
+        return listings, time.perf_counter() - start
+
+    def test_operations(self):
+        async def run():
+            async with AsyncTodoApp() as app:
+                user = self.users[0]
+                todo_id = await app.add_todo(user, "async", "high", "2024-01-01")
+                self.assertEqual(await app.mark_as_done(user, todo_id), 1)
+                self.assertEqual(await app.count_todos(user), 2)
+                self.assertEqual((await app.todo_stats(user))["done"], 1)
+                todos = await app.list_todos(user, sort=True)
+                self.assertEqual(todos[-1].id, todo_id)
+                self.assertEqual(await app.delete_todo(user, todo_id), 1)
+
+        asyncio.run(run())
+
+    def test_list_many(self):
+        listings, _ = self.list_many(max_workers=4)
+
+        self.assertEqual(list(listings), self.users)
+        for user, todos in listings.items():
+            self.assertEqual([todo.todo for todo in todos], [f"todo for {user}"])
+
+    def test_throughput_scales_with_concurrency(self):
+        _, sequential = self.list_many(max_workers=1)
+        _, concurrent = self.list_many(max_workers=8)
+
+        self.assertGreaterEqual(sequential, LATENCY * len(self.users))
+        self.assertLess(concurrent, sequential / 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import io
+import os
+import random
+import string
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from todo.__main__ import create_arg_parser
+from todo.client import forward
+from todo.src import drop_user_collection
+from todo.src.daemon import create_server
+
+
+def get_random_string(length):
+    letters = string.ascii_lowercase
+    return "".join(random.choice(letters) for i in range(length))
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.user = get_random_string(10)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "daemon.sock")
+        self.server = create_server(self.path)
+        threading.Thread(
+            target=self.server.serve_forever, args=(0.01,), daemon=True
+        ).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.directory.cleanup()
+        drop_user_collection(self.user)
+
+    def run_command(self, *argv, path=None) -> tuple[bool, str]:
+        args = create_arg_parser().parse_args(argv)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            forwarded = forward(args, path or self.path)
+        return forwarded, output.getvalue()
+
+    def test_commands_are_forwarded(self):
+        forwarded, output = self.run_command("add", self.user, "from the daemon")
+        self.assertTrue(forwarded)
+        self.assertIn("Todo added successfully", output)
+
+        forwarded, output = self.run_command("list", self.user)
+        self.assertTrue(forwarded)
+        self.assertIn("from the daemon", output)
+
+    def test_errors_are_forwarded(self):
+        forwarded, output = self.run_command("done", self.user, "not-an-id")
+        self.assertTrue(forwarded)
+        self.assertIn("ERROR", output)
+
+    def test_no_daemon_runs_in_process(self):
+        missing = os.path.join(self.directory.name, "missing.sock")
+        forwarded, output = self.run_command("list", self.user, path=missing)
+        self.assertFalse(forwarded)
+        self.assertEqual(output, "")
+
+    def test_local_commands_are_not_forwarded(self):
+        self.assertFalse(self.run_command("sync")[0])
+        self.assertFalse(self.run_command("done", self.user, "-")[0])
+
+    def test_other_database_runs_in_process(self):
+        other = os.path.join(self.directory.name, "other.db")
+        with mock.patch.dict(os.environ, {"TODO_SQLITE_PATH": other}):
+            forwarded, output = self.run_command("list", self.user)
+        self.assertFalse(forwarded)
+        self.assertEqual(output, "")
+
+    def test_second_daemon_is_refused(self):
+        with self.assertRaises(Exception):
+            create_server(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import random
+import string
+import unittest
+
+from todo.src.app import delete_todos, add_todo, list_todos, drop_user_collection
+
+
+def get_random_string(length):
+    letters = string.ascii_lowercase
+    return "".join(random.choice(letters) for i in range(length))
+
+
+class TestDeleteTodos(unittest.TestCase):
+    def setUp(self):
+        self.user = get_random_string(20)
+        self.todo_ids = [
+            add_todo(self.user, get_random_string(20), "low") for i in range(3)
+        ]
+
+    def tearDown(self):
+        drop_user_collection(self.user)
+
+    def test_delete_todos(self):
+        deleted, missing = delete_todos(self.user, self.todo_ids[:2])
+        self.assertEqual(sorted(deleted), sorted(self.todo_ids[:2]))
+        self.assertEqual(missing, [])
+        self.assertEqual(len(list(list_todos(self.user))), 1)
+
+    def test_delete_todos_reports_missing(self):
+        unknown_id = "000000000000000000000000"
+        deleted, missing = delete_todos(
+            self.user, [self.todo_ids[0], unknown_id, "invalid_id"]
+        )
+        self.assertEqual(deleted, [self.todo_ids[0]])
+        self.assertEqual(missing, [unknown_id, "invalid_id"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import random
+import string
+import unittest
+
+from todo.src.app import mark_all_as_done, add_todo, list_todos, drop_user_collection
+
+
+def get_random_string(length):
+    letters = string.ascii_lowercase
+    return "".join(random.choice(letters) for i in range(length))
+
+
+class TestMarkAllAsDone(unittest.TestCase):
+    def setUp(self):
+        self.user = get_random_string(20)
+        self.todo_ids = [
+            add_todo(self.user, get_random_string(20), "low") for i in range(3)
+        ]
+
+    def tearDown(self):
+        drop_user_collection(self.user)
+
+    def test_mark_all_as_done(self):
+        done, missing = mark_all_as_done(self.user, self.todo_ids)
+        self.assertEqual(sorted(done), sorted(self.todo_ids))
+        self.assertEqual(missing, [])
+        self.assertTrue(all(todo["done"] for todo in list_todos(self.user)))
+
+    def test_mark_all_as_done_reports_missing(self):
+        unknown_id = "000000000000000000000000"
+        done, missing = mark_all_as_done(
+            self.user, [self.todo_ids[0].upper(), unknown_id]
+        )
+        self.assertEqual(done, [self.todo_ids[0]])
+        self.assertEqual(missing, [unknown_id])
+
+
+if __name__ == "__main__":
+    unittest.main()
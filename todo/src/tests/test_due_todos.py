@@ -0,0 +1,113 @@
+import io
+import random
+import string
+import unittest
+from datetime import datetime, timedelta
+
+from rich.console import Console
+
+from todo.src.app import (
+    add_todo,
+    display_agenda,
+    drop_user_collection,
+    due_filter,
+    mark_as_done,
+    parse_duration,
+    todo_agenda,
+    today_start,
+)
+from todo.src.storage.mongo import to_mongo_query
+
+
+def get_random_string(length):
+    letters = string.ascii_lowercase
+    return "".join(random.choice(letters) for i in range(length))
+
+
+class TestDueTodos(unittest.TestCase):
+    def setUp(self):
+        self.user = get_random_string(20)
+        self.today = today_start()
+
+        def add(name, days, priority="low"):
+            end_date = (self.today + timedelta(days=days)).strftime("%Y-%m-%d")
+            return add_todo(self.user, name, priority, end_date)
+
+        add("late", -3)
+        add("late too", -3, "high")
+        done = add("late but done", -1)
+        mark_as_done(self.user, done)
+        add("today", 0)
+        add("in a week", 7)
+        add("later", 8)
+        add_todo(self.user, "someday", "low")
+
+    def tearDown(self):
+        drop_user_collection(self.user)
+
+    def agenda(self, **kwargs) -> dict[datetime, list[str]]:
+        days = todo_agenda(self.user, due_filter(**kwargs))
+        return {day.day: [todo.todo for todo in day.todos] for day in days}
+
+    def test_overdue(self):
+        self.assertEqual(
+            self.agenda(overdue=True),
+            {self.today - timedelta(days=3): ["late", "late too"]},
+        )
+
+    def test_within_includes_today_and_last_day(self):
+        self.assertEqual(
+            self.agenda(within="1w"),
+            {self.today: ["today"], self.today + timedelta(days=7): ["in a week"]},
+        )
+
+    def test_default_is_overdue_and_next_week(self):
+        agenda = self.agenda()
+        self.assertEqual(list(agenda), sorted(agenda))
+        self.assertEqual(sum(len(todos) for todos in agenda.values()), 4)
+        self.assertEqual(self.agenda(), self.agenda(overdue=True, within="7d"))
+
+    def test_priority(self):
+        self.assertEqual(
+            self.agenda(priority="high"),
+            {self.today - timedelta(days=3): ["late too"]},
+        )
+
+    def test_per_day_keeps_the_count(self):
+        late, *_ = todo_agenda(self.user, due_filter(), per_day=1)
+
+        self.assertEqual(late.total, 2)
+        self.assertEqual([todo.todo for todo in late.todos], ["late"])
+
+    def test_display(self):
+        output = io.StringIO()
+        days = todo_agenda(self.user, due_filter(), per_day=1)
+        display_agenda(Console(file=output, width=120), days, self.today)
+
+        self.assertIn("Today", output.getvalue())
+        self.assertIn("... and 1 more", output.getvalue())
+        self.assertIn("4 open todos, 2 overdue", output.getvalue())
+
+    def test_ranges_on_end_date(self):
+        query = to_mongo_query(due_filter(within="2w", today=self.today))
+        self.assertEqual(
+            query,
+            {
+                "done": False,
+                "end_date": {
+                    "$gte": self.today,
+                    "$lt": self.today + timedelta(days=15),
+                },
+            },
+        )
+
+    def test_parse_duration(self):
+        self.assertEqual(parse_duration("7d"), timedelta(days=7))
+        self.assertEqual(parse_duration("2W"), timedelta(days=14))
+        for value in ["7", "d", "-1d", "7h"]:
+            with self.assertRaises(ValueError):
+                parse_duration(value)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import random
+import string
+import unittest
+
+from todo.src.app import (
+    add_todo,
+    drop_user_collection,
+    ensure_indexes,
+    explain_todos,
+    make_filter,
+)
+
+
+def get_random_string(length):
+    letters = string.ascii_lowercase
+    return "".join(random.choice(letters) for i in range(length))
+
+
+class TestEnsureIndexes(unittest.TestCase):
+    def setUp(self):
+        self.user = get_random_string(20)
+        add_todo(self.user, get_random_string(20), "low", "2022-12-31")
+
+    def tearDown(self):
+        drop_user_collection(self.user)
+
+    def test_ensure_indexes(self):
+        indexes = ensure_indexes([self.user])
+        self.assertEqual(list(indexes), [self.user])
+        self.assertTrue(indexes[self.user])
+
+    def test_ensure_indexes_all_users(self):
+        self.assertIn(self.user, ensure_indexes())
+
+    def test_explain_filtered_sorted_listing(self):
+        plan = explain_todos(self.user, sort=True, query=make_filter(priority="low"))
+        self.assertIn("priority_end_date", str(plan))
+        self.assertNotIn("TEMP B-TREE", str(plan))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import io
+import json
+import os
+import random
+import string
+import tempfile
+import unittest
+from datetime import timedelta
+
+from todo.src.app import (
+    add_todo,
+    archive_todos,
+    drop_user_collection,
+    list_todos,
+    mark_as_done,
+)
+from todo.src.exporter import export_todos, parse_since
+from todo.src.importer import import_todos
+from todo.src.model import utcnow
+
+
+def get_random_string(length):
+    letters = string.ascii_lowercase
+    return "".join(random.choice(letters) for i in range(length))
+
+
+class TestExportTodos(unittest.TestCase):
+    def setUp(self):
+        self.user = get_random_string(20)
+        self.copy = get_random_string(20)
+        self.ids = [
+            add_todo(self.user, "test0", "low"),
+            add_todo(self.user, "test1", "high", "2022-12-31"),
+            add_todo(self.user, "test2", "medium", "2022-01-01"),
+        ]
+
+    def tearDown(self):
+        drop_user_collection(self.user)
+        drop_user_collection(self.copy)
+
+    def export(self, **kwargs) -> str:
+        out = io.StringIO()
+        export_todos(self.user, out, **kwargs)
+        return out.getvalue()
+
+    def test_export_jsonl_in_sort_order(self):
+        records = [json.loads(line) for line in self.export(batch_size=1).splitlines()]
+
+        self.assertEqual([r["todo"] for r in records], ["test0", "test2", "test1"])
+        self.assertEqual(records[2]["end_date"], "2022-12-31")
+        self.assertIsNotNone(records[0]["updated_at"])
+
+    def test_export_progress(self):
+        progress = []
+        export_todos(
+            self.user, io.StringIO(), batch_size=2, on_progress=progress.append
+        )
+        self.assertEqual(progress, [2, 3])
+
+    def test_csv_round_trip(self):
+        mark_as_done(self.user, self.ids[1])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "todos.csv")
+            with open(path, "w", newline="") as out:
+                self.assertEqual(export_todos(self.user, out, "csv"), 3)
+            report = import_todos(self.copy, path)
+
+        self.assertEqual(report.imported, 3)
+        fields = ["todo", "priority", "end_date", "done"]
+        original, copy = (
+            sorted([todo[field] for field in fields] for todo in list_todos(user))
+            for user in (self.user, self.copy)
+        )
+        self.assertEqual(copy, original)
+
+    def test_since_only_exports_changes(self):
+        since = utcnow()
+        self.assertEqual(self.export(since=since), "")
+
+        mark_as_done(self.user, self.ids[0])
+        add_todo(self.user, "test3", "low")
+        records = [json.loads(line) for line in self.export(since=since).splitlines()]
+
+        self.assertEqual(sorted(r["todo"] for r in records), ["test0", "test3"])
+        self.assertTrue(
+            all(r["updated_at"] >= since.isoformat() for r in records), records
+        )
+
+    def test_done_again_keeps_updated_at(self):
+        mark_as_done(self.user, self.ids[0])
+        since = utcnow() + timedelta(microseconds=1)
+        mark_as_done(self.user, self.ids[0])
+        self.assertEqual(self.export(since=since), "")
+
+    def test_include_archived(self):
+        mark_as_done(self.user, self.ids[0])
+        archive_todos(self.user, "0d")
+
+        self.assertEqual(len(self.export().splitlines()), 2)
+        records = [
+            json.loads(line) for line in self.export(include_archived=True).splitlines()
+        ]
+        self.assertEqual([r["todo"] for r in records], ["test0", "test2", "test1"])
+        self.assertTrue(records[0]["done"])
+
+    def test_parse_since(self):
+        self.assertEqual(parse_since("2024-02-07").isoformat(), "2024-02-07T00:00:00")
+        self.assertEqual(
+            parse_since("2024-02-07T10:00:00+02:00").isoformat(),
+            "2024-02-07T08:00:00",
+        )
+        with self.assertRaises(ValueError):
+            parse_since("yesterday")
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            self.export(file_format="xml")
+
+
+if __name__ == "__main__":
+    unittest.main()
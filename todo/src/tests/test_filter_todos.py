@@ -0,0 +1,99 @@
+import io
+import random
+import string
+import unittest
+from datetime import datetime
+
+from rich.console import Console
+
+from todo.__main__ import create_arg_parser
+from todo.src.app import (
+    add_todo,
+    app,
+    count_todos,
+    delete_where,
+    drop_user_collection,
+    list_todos,
+    make_filter,
+    mark_done_where,
+)
+from todo.src.storage.mongo import to_mongo_query
+
+
+def get_random_string(length):
+    letters = string.ascii_lowercase
+    return "".join(random.choice(letters) for i in range(length))
+
+
+class TestFilterTodos(unittest.TestCase):
+    def setUp(self):
+        self.user = get_random_string(20)
+        add_todo(self.user, "Write report", "low", "2022-12-31")
+        add_todo(self.user, "Review 100% of PRs", "low", "2023-10-05")
+        add_todo(self.user, "Plan sprint", "high", "2024-02-07")
+        add_todo(self.user, "Read a book", "low")
+
+    def tearDown(self):
+        drop_user_collection(self.user)
+
+    def test_list_date_range(self):
+        query = make_filter(after="2022-12-31", before="2024-02-07")
+        todos = list(list_todos(self.user, query=query))
+        self.assertEqual(
+            {todo["todo"] for todo in todos}, {"Write report", "Review 100% of PRs"}
+        )
+
+    def test_list_text(self):
+        self.assertEqual(count_todos(self.user, make_filter(text="REPORT")), 1)
+        self.assertEqual(count_todos(self.user, make_filter(text="100%")), 1)
+        self.assertEqual(count_todos(self.user, make_filter(text="_")), 0)
+
+    def test_mark_done_where(self):
+        query = make_filter(priority="low", before="2024-01-01", status="open")
+        self.assertEqual(count_todos(self.user, query), 2)
+        self.assertEqual(mark_done_where(self.user, query), 2)
+        self.assertEqual(count_todos(self.user, query), 0)
+        self.assertEqual(count_todos(self.user, make_filter(status="done")), 2)
+
+    def test_delete_where(self):
+        self.assertEqual(delete_where(self.user, make_filter(priority="low")), 3)
+        self.assertEqual(count_todos(self.user), 1)
+
+    def test_dry_run_with_ids_writes_nothing(self):
+        todo_id = add_todo(self.user, "Keep me", "low")
+
+        for action in ["done", "delete"]:
+            with self.subTest(action=action):
+                output = io.StringIO()
+                args = create_arg_parser().parse_args(
+                    [action, self.user, todo_id, "--dry-run"]
+                )
+                app(Console(file=output, width=120), args)
+
+                self.assertIn("--dry-run only works with filters", output.getvalue())
+                todos = list(list_todos(self.user, query=make_filter(text="Keep")))
+                self.assertEqual(len(todos), 1)
+                self.assertFalse(todos[0].done)
+
+    def test_invalid_date(self):
+        with self.assertRaises(ValueError):
+            make_filter(before="2022/12/31")
+
+    def test_mongo_query(self):
+        query = make_filter("low", "open", "2022-01-01", "2023-01-01", "a.b")
+        self.assertEqual(
+            to_mongo_query(query),
+            {
+                "priority": "low",
+                "done": False,
+                "end_date": {
+                    "$gte": datetime(2022, 1, 1),
+                    "$lt": datetime(2023, 1, 1),
+                },
+                "todo": {"$regex": "a\\.b", "$options": "i"},
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
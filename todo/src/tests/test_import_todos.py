@@ -0,0 +1,89 @@
+import os
+import random
+import string
+import tempfile
+import unittest
+
+from todo.src.app import list_todos, drop_user_collection
+from todo.src.importer import import_todos
+
+
+def get_random_string(length):
+    letters = string.ascii_lowercase
+    return "".join(random.choice(letters) for i in range(length))
+
+
+class TestImportTodos(unittest.TestCase):
+    def setUp(self):
+        self.user = get_random_string(20)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        drop_user_collection(self.user)
+        self.directory.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_import_csv(self):
+        path = self.write(
+            "todos.csv",
+            "todo,priority,end_date,done\n"
+            "test0,low,2022-12-31,false\n"
+            "test1,high,,yes\n"
+            "test2,,2024-02-07,\n",
+        )
+        report = import_todos(self.user, path)
+
+        self.assertEqual(report.imported, 3)
+        self.assertEqual(report.failed, 0)
+        todos = {todo["todo"]: todo for todo in list_todos(self.user)}
+        self.assertTrue(todos["test1"]["done"])
+        self.assertIsNone(todos["test1"]["end_date"])
+        self.assertEqual(todos["test2"]["priority"], "medium")
+
+    def test_import_jsonl_reports_bad_rows(self):
+        path = self.write(
+            "todos.jsonl",
+            '{"todo": "test0", "priority": "low"}\n'
+            "\n"
+            '{"todo": "test1", "priority": "urgent"}\n'
+            "not json\n"
+            '{"todo": "test2", "end_date": "2022-12-32"}\n'
+            '{"todo": "test3"}\n',
+        )
+        errors = []
+        report = import_todos(
+            self.user, path, on_error=lambda line, message: errors.append(line)
+        )
+
+        self.assertEqual(report.imported, 2)
+        self.assertEqual(report.failed, 3)
+        self.assertEqual(errors, [3, 4, 5])
+        self.assertEqual(len(list(list_todos(self.user))), 2)
+
+    def test_import_in_batches(self):
+        path = self.write(
+            "todos.jsonl", "".join(f'{{"todo": "test{i}"}}\n' for i in range(5))
+        )
+        progress = []
+        report = import_todos(
+            self.user,
+            path,
+            batch_size=2,
+            on_progress=lambda report: progress.append(report.imported),
+        )
+
+        self.assertEqual(report.imported, 5)
+        self.assertEqual(progress, [2, 4, 5])
+
+    def test_import_unknown_format(self):
+        with self.assertRaises(ValueError):
+            import_todos(self.user, "todos.txt")
+
+
+if __name__ == "__main__":
+    unittest.main()
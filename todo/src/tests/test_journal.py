@@ -0,0 +1,145 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from bson.objectid import ObjectId
+
+from todo.src.journal import Journal, JournaledBackend, coalesce
+from todo.src.model import Todo
+from todo.src.storage.sqlite import SqliteBackend
+
+
+class CountingBackend(SqliteBackend):
+    def __init__(self):
+        super().__init__(":memory:")
+        self.calls = []
+
+    def add_many(self, user, todos):
+        self.calls.append("add_many")
+        return super().add_many(user, todos)
+
+    def mark_done_many(self, user, todo_ids):
+        self.calls.append("mark_done_many")
+        return super().mark_done_many(user, todo_ids)
+
+    def delete_many(self, user, todo_ids):
+        self.calls.append("delete_many")
+        return super().delete_many(user, todo_ids)
+
+
+class TestCoalesce(unittest.TestCase):
+    def add(self, todo_id):
+        return {
+            "op": "add",
+            "user": "alice",
+            "id": todo_id,
+            "todo": "a",
+            "priority": "low",
+            "end_date": "2024-01-01T00:00:00",
+            "done": False,
+        }
+
+    def test_add_then_done_is_one_add(self):
+        done = {"op": "done", "user": "alice", "ids": ["1"]}
+        plan = coalesce([self.add("1"), done])["alice"]
+
+        self.assertEqual(list(plan.adds), ["1"])
+        self.assertTrue(plan.adds["1"].done)
+        self.assertEqual(plan.adds["1"].end_date, datetime(2024, 1, 1))
+        self.assertFalse(plan.done)
+
+    def test_add_done_delete_is_nothing(self):
+        plan = coalesce(
+            [
+                self.add("1"),
+                {"op": "done", "user": "alice", "ids": ["1"]},
+                {"op": "delete", "user": "alice", "ids": ["1"]},
+            ]
+        )["alice"]
+
+        self.assertFalse(plan.adds or plan.done or plan.deleted)
+
+    def test_done_then_delete_is_one_delete(self):
+        plan = coalesce(
+            [
+                {"op": "done", "user": "alice", "ids": ["2"]},
+                {"op": "delete", "user": "alice", "ids": ["2"]},
+                {"op": "done", "user": "alice", "ids": ["2"]},
+            ]
+        )["alice"]
+
+        self.assertFalse(plan.done)
+        self.assertEqual(list(plan.deleted), ["2"])
+
+
+class TestJournaledBackend(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.journal = Journal(os.path.join(self.directory.name, "journal.jsonl"))
+        self.backend = CountingBackend()
+        self.journaled = JournaledBackend(
+            lambda: self.backend, self.journal, auto_flush="off"
+        )
+
+    def tearDown(self):
+        self.journaled.close()
+        self.directory.cleanup()
+
+    def test_writes_wait_in_the_journal(self):
+        self.journaled.add("alice", Todo(None, "a", "low", None, False))
+
+        self.assertTrue(self.journal.pending())
+        self.assertEqual(self.backend.calls, [])
+
+    def test_flush_replays_net_operations_in_batches(self):
+        kept = self.journaled.add("alice", Todo(None, "a", "low", None, False))
+        dropped = self.journaled.add("alice", Todo(None, "b", "low", None, False))
+        self.journaled.mark_done_many("alice", [kept, dropped])
+        self.journaled.delete("alice", dropped)
+
+        report = self.journaled.flush()
+
+        self.assertEqual((report.added, report.done, report.deleted), (1, 0, 0))
+        self.assertEqual(self.backend.calls, ["add_many"])
+        self.assertFalse(self.journal.pending())
+        todos = list(self.backend.find("alice"))
+        self.assertEqual([(t.id, t.done) for t in todos], [(kept, True)])
+
+    def test_reads_see_journaled_writes(self):
+        todo_id = self.journaled.add("alice", Todo(None, "a", "low", None, False))
+
+        todos = list(self.journaled.find("alice"))
+
+        self.assertEqual([todo.id for todo in todos], [todo_id])
+
+    def test_replayed_adds_are_not_duplicated(self):
+        todo = Todo(str(ObjectId()), "a", "low", None, False)
+        self.backend.add_many("alice", [todo])
+        self.journaled.add("alice", todo)
+
+        self.journaled.flush()
+
+        self.assertEqual(self.backend.count("alice"), 1)
+
+    def test_missing_todos_are_reported(self):
+        self.journaled.delete("alice", str(ObjectId()))
+
+        report = self.journaled.flush()
+
+        self.assertEqual(report.deleted, 0)
+        self.assertEqual(len(report.errors), 1)
+
+    def test_rejected_entries_are_kept_until_taken(self):
+        todo_id = str(ObjectId())
+        self.journaled.mark_done("alice", todo_id)
+        self.journaled.flush()
+
+        self.assertEqual(
+            self.journal.take_rejected(), [f"alice: todo not found (id: {todo_id})"]
+        )
+        self.assertEqual(self.journal.take_rejected(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from todo.src.cache import CachedBackend, ListCache
+from todo.src.model import Todo
+from todo.src.storage import TodoFilter, backend_fingerprint
+from todo.src.storage.sqlite import SqliteBackend
+
+
+class CountingBackend(SqliteBackend):
+    def __init__(self):
+        super().__init__(":memory:")
+        self.reads = 0
+
+    def find(self, *args, **kwargs):
+        self.reads += 1
+        return super().find(*args, **kwargs)
+
+
+class TestListCache(unittest.TestCase):
+    def setUp(self):
+        self.backend = CountingBackend()
+        self.cached = CachedBackend(lambda: self.backend, ListCache(":memory:"))
+        self.todo_id = self.cached.add("alice", Todo(None, "a", "low", None, False))
+
+    def tearDown(self):
+        self.cached.close()
+
+    def test_repeated_listing_is_cached(self):
+        first = list(self.cached.find("alice"))
+        second = list(self.cached.find("alice"))
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.backend.reads, 1)
+
+    def test_queries_are_cached_separately(self):
+        list(self.cached.find("alice"))
+        list(self.cached.find("alice", TodoFilter(priority="high")))
+        self.assertEqual(self.backend.reads, 2)
+
+    def test_write_invalidates(self):
+        list(self.cached.find("alice"))
+        self.cached.mark_done("alice", self.todo_id)
+        (todo,) = self.cached.find("alice")
+
+        self.assertTrue(todo.done)
+        self.assertEqual(self.backend.reads, 2)
+
+    def test_write_only_invalidates_its_user(self):
+        list(self.cached.find("alice"))
+        self.cached.add("bob", Todo(None, "b", "low", None, False))
+        list(self.cached.find("alice"))
+        self.assertEqual(self.backend.reads, 1)
+
+    def test_databases_are_cached_separately(self):
+        other = CountingBackend()
+        cached = CachedBackend(lambda: other, self.cached.cache, "other")
+        list(self.cached.find("alice"))
+
+        self.assertEqual(list(cached.find("alice")), [])
+        self.assertEqual(other.reads, 1)
+
+    def test_backend_fingerprint(self):
+        mongo = {"backend": "mongo", "mongo_uri": "mongodb://user:secret@a"}
+        configs = [
+            mongo,
+            {**mongo, "mongo_uri": "mongodb://b"},
+            {**mongo, "mongo_layout": "shared"},
+            {"backend": "sqlite", "sqlite_path": "a.db"},
+            {"backend": "sqlite", "sqlite_path": "b.db"},
+        ]
+        # The test suite picks its backend through these
+        with mock.patch.dict(os.environ):
+            os.environ.pop("TODO_BACKEND", None)
+            os.environ.pop("TODO_SQLITE_PATH", None)
+            fingerprints = {backend_fingerprint(config) for config in configs}
+            self.assertNotIn("secret", backend_fingerprint(mongo))
+
+        self.assertEqual(len(fingerprints), 5)
+
+    def test_ttl(self):
+        self.cached.cache.ttl = 0
+        list(self.cached.find("alice"))
+        list(self.cached.find("alice"))
+        self.assertEqual(self.backend.reads, 2)
+
+    def test_max_entries(self):
+        self.cached.cache.max_entries = 1
+        list(self.cached.find("alice"))
+        list(self.cached.find("alice", sort=True))
+        list(self.cached.find("alice"))
+        self.assertEqual(self.backend.reads, 3)
+
+    def test_large_listings_are_not_cached(self):
+        self.cached.cache.max_rows = 0
+        list(self.cached.find("alice"))
+        list(self.cached.find("alice"))
+        self.assertEqual(self.backend.reads, 2)
+
+    def test_stats_cached_until_write(self):
+        today = datetime(2024, 1, 1)
+        self.assertEqual(self.cached.stats("alice", TodoFilter(), today)["total"], 1)
+        self.cached.add("alice", Todo(None, "b", "low", None, False))
+        self.assertEqual(self.cached.stats("alice", TodoFilter(), today)["total"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
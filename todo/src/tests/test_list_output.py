@@ -0,0 +1,76 @@
+import io
+import json
+import random
+import string
+import unittest
+
+from rich.console import Console
+
+from todo.__main__ import create_arg_parser
+from todo.src.app import add_todo, app, drop_user_collection, mark_as_done
+
+
+def get_random_string(length):
+    letters = string.ascii_lowercase
+    return "".join(random.choice(letters) for i in range(length))
+
+
+class TestListOutput(unittest.TestCase):
+    def setUp(self):
+        self.user = get_random_string(20)
+        self.first = add_todo(self.user, "test0\twith a tab", "low", "2022-12-31")
+        self.second = add_todo(self.user, "test1", "high")
+        mark_as_done(self.user, self.second)
+
+    def tearDown(self):
+        drop_user_collection(self.user)
+
+    def run_list(self, *options, terminal=False) -> str:
+        output = io.StringIO()
+        console = Console(file=output, width=120, force_terminal=terminal)
+        args = create_arg_parser().parse_args(["list", self.user, "--sort", *options])
+        app(console, args)
+        return output.getvalue()
+
+    def test_piped_output_is_plain(self):
+        lines = self.run_list().splitlines()
+
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[0].split()[:4], ["-", "high", "yes", self.second])
+        self.assertTrue(lines[1].startswith("2022-12-31  low     no "))
+        self.assertNotIn("Completed", self.run_list())
+
+    def test_terminal_output_is_a_table(self):
+        self.assertIn("Completed", self.run_list(terminal=True))
+        self.assertIn("Completed", self.run_list("--output", "table"))
+
+    def test_table_hints_the_next_page(self):
+        output = self.run_list("--output", "table", "--limit", "1")
+        self.assertIn(f"Next page: --after ,{self.second}", output)
+        self.assertNotIn("Next page", self.run_list("--output", "table"))
+
+    def test_tsv(self):
+        rows = [
+            line.split("\t") for line in self.run_list("--output", "tsv").splitlines()
+        ]
+
+        self.assertEqual(rows[0], ["end_date", "todo", "priority", "done", "id"])
+        self.assertEqual(rows[1], ["", "test1", "high", "yes", self.second])
+        self.assertEqual(rows[2][1], "test0 with a tab")
+
+    def test_json(self):
+        records = [
+            json.loads(line)
+            for line in self.run_list(
+                "--output", "json", "--page-size", "1"
+            ).splitlines()
+        ]
+
+        self.assertEqual([r["id"] for r in records], [self.second, self.first])
+        self.assertEqual(records[1]["end_date"], "2022-12-31")
+        self.assertTrue(records[0]["done"])
+        self.assertIsNotNone(records[0]["updated_at"])
+
+
+if __name__ == "__main__":
+    unittest.main()
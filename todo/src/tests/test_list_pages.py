@@ -0,0 +1,88 @@
+import contextlib
+import io
+import random
+import string
+import unittest
+from unittest import mock
+
+from todo.__main__ import create_arg_parser
+from todo.src.app import (
+    add_todo,
+    drop_user_collection,
+    format_cursor,
+    list_pages,
+    list_todos,
+    parse_cursor,
+)
+
+
+def get_random_string(length):
+    letters = string.ascii_lowercase
+    return "".join(random.choice(letters) for i in range(length))
+
+
+class TestListPages(unittest.TestCase):
+    def setUp(self):
+        self.user = get_random_string(20)
+        # Out of end date order, so insertion order is not the sort order
+        self.dates = ["2023-10-05", "2022-12-31", None, "2022-12-31", None]
+
+        for date in self.dates:
+            add_todo(self.user, get_random_string(20), "low", date)
+
+    def tearDown(self):
+        drop_user_collection(self.user)
+
+    def test_pages_follow_sort_order(self):
+        pages = list(list_pages(self.user, sort=True, page_size=2))
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+
+        todos = [todo for page in pages for todo in page]
+        expected = [todo["_id"] for todo in list_todos(self.user, sort=True)]
+        self.assertEqual([todo["_id"] for todo in todos], expected)
+
+    def test_every_keyset_page_is_sorted(self):
+        # SQLite reads unsorted listings through the end date index, which
+        # would hide an unsorted first page there
+        with mock.patch("todo.src.app.list_todos", wraps=list_todos) as wrapped:
+            list(list_pages(self.user, sort=True, page_size=2))
+        self.assertTrue(all(call.args[1] for call in wrapped.call_args_list))
+
+    def test_pages_limit(self):
+        pages = list(list_pages(self.user, sort=True, page_size=2, limit=3))
+        self.assertEqual([len(page) for page in pages], [2, 1])
+
+    def test_unsorted_pages(self):
+        pages = list(list_pages(self.user, page_size=4))
+        self.assertEqual([len(page) for page in pages], [4, 1])
+
+    def test_resume_after_cursor(self):
+        todos = list(list_todos(self.user, sort=True))
+
+        for index, todo in enumerate(todos):
+            after = parse_cursor(format_cursor(todo))
+            rest = [
+                todo for page in list_pages(self.user, after=after) for todo in page
+            ]
+            self.assertEqual(rest, todos[index + 1 :])
+
+    def test_sizes_must_be_positive(self):
+        for argv in [
+            ["list", self.user, "--page-size", "0"],
+            ["list", self.user, "--limit", "-1"],
+            ["export", self.user, "--batch-size", "0"],
+        ]:
+            with self.subTest(argv=argv), self.assertRaises(SystemExit):
+                with contextlib.redirect_stderr(io.StringIO()):
+                    create_arg_parser().parse_args(argv)
+
+        args = create_arg_parser().parse_args(["list", self.user, "--limit", "3"])
+        self.assertEqual(args.limit, 3)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            parse_cursor("2022-12-31")
+
+
+if __name__ == "__main__":
+    unittest.main()
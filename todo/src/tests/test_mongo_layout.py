@@ -0,0 +1,124 @@
+import os
+import random
+import string
+import unittest
+from datetime import timedelta
+
+from bson.objectid import ObjectId
+
+from todo.src.config import load_config
+from todo.src.model import Todo, utcnow
+from todo.src.storage.mongo import (
+    SHARED_COLLECTION,
+    MongoBackend,
+    migrate_to_shared,
+)
+
+# The client only connects on the first query, building one needs no server
+URI = "mongodb://localhost:27017"
+
+
+def get_random_string(length):
+    letters = string.ascii_lowercase
+    return "".join(random.choice(letters) for i in range(length))
+
+
+class TestMongoLayout(unittest.TestCase):
+    def test_per_user_layout(self):
+        backend = MongoBackend(URI)
+        todo = Todo(None, "a", "low", None, False)
+
+        self.assertEqual(backend.collection("alice").name, "alice")
+        self.assertEqual(backend.scoped("alice", {"done": True}), {"done": True})
+        self.assertNotIn("user", backend.to_document("alice", todo))
+
+    def test_shared_layout(self):
+        backend = MongoBackend(URI, layout="shared")
+        todo = Todo(str(ObjectId()), "a", "low", None, False)
+
+        self.assertEqual(backend.collection("alice").name, SHARED_COLLECTION)
+        self.assertEqual(
+            backend.scoped("alice", {"done": True}), {"user": "alice", "done": True}
+        )
+        document = backend.to_document("alice", todo)
+        self.assertEqual(document["user"], "alice")
+        self.assertEqual(str(document["_id"]), todo.id)
+
+    def test_unknown_layout(self):
+        with self.assertRaises(ValueError):
+            MongoBackend(URI, layout="sharded")
+
+
+@unittest.skipUnless(
+    os.environ.get("TODO_BACKEND") == "mongo", "needs TODO_BACKEND=mongo"
+)
+class TestMigrateLayout(unittest.TestCase):
+    def setUp(self):
+        self.database = f"todo_test_{get_random_string(8)}"
+        uri = load_config()["mongo_uri"]
+        self.per_user = MongoBackend(uri, self.database)
+        self.shared = MongoBackend(uri, self.database, layout="shared")
+
+    def tearDown(self):
+        self.per_user.client.drop_database(self.database)
+        self.per_user.close()
+        self.shared.close()
+
+    def test_migration_copies_and_resumes(self):
+        for user in ["alice", "bob"]:
+            self.per_user.add_many(
+                user, [Todo(None, str(i), "low", None, False) for i in range(5)]
+            )
+
+        copied = migrate_to_shared(self.per_user.database, batch_size=2)
+        self.assertEqual(copied, {"alice": 5, "bob": 5})
+
+        self.per_user.add("alice", Todo(None, "late", "high", None, False))
+        copied = migrate_to_shared(self.per_user.database, batch_size=2)
+        self.assertEqual(copied, {"alice": 1, "bob": 0})
+
+        self.assertEqual(self.shared.list_users(), ["alice", "bob"])
+        self.assertEqual(self.shared.count("alice"), 6)
+        self.assertEqual(
+            [todo.id for todo in self.shared.find("bob", sort=True)],
+            [todo.id for todo in self.per_user.find("bob", sort=True)],
+        )
+
+    def test_rerun_catches_up_with_changes(self):
+        self.per_user.add_many(
+            "alice", [Todo(None, str(i), "low", None, False) for i in range(3)]
+        )
+        ids = [todo.id for todo in self.per_user.find("alice", sort=True)]
+        migrate_to_shared(self.per_user.database)
+
+        self.per_user.mark_done("alice", ids[0])
+        self.per_user.delete("alice", ids[1])
+        copied = migrate_to_shared(self.per_user.database)
+
+        self.assertEqual(copied, {"alice": 2})
+        self.assertEqual(
+            [(todo.id, todo.done) for todo in self.shared.find("alice", sort=True)],
+            [(ids[0], True), (ids[2], False)],
+        )
+
+    def test_archives_are_migrated(self):
+        self.per_user.add_many(
+            "alice", [Todo(None, str(i), "low", None, True) for i in range(3)]
+        )
+        self.per_user.archive("alice", utcnow() + timedelta(days=1), batch_size=2)
+        self.per_user.add("alice", Todo(None, "open", "high", None, False))
+
+        copied = migrate_to_shared(self.per_user.database, batch_size=2)
+
+        self.assertEqual(copied, {"alice": 4})
+        self.assertEqual(self.shared.list_users(), ["alice"])
+        self.assertEqual(self.shared.count("alice"), 1)
+        self.assertEqual(self.shared.count_archived("alice"), 3)
+        self.assertEqual(
+            [todo.id for todo in self.shared.find_archived("alice", sort=True)],
+            [todo.id for todo in self.per_user.find_archived("alice", sort=True)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+
+from todo.src.storage.mongo_client import MongoSettings, create_client
+
+URI = "mongodb://localhost:27017"
+
+
+class TestMongoSettings(unittest.TestCase):
+    def setUp(self):
+        self.config = {
+            "mongo_uri": URI,
+            "mongo": {
+                "compressors": ["zstd", "zlib"],
+                "zlib_level": 6,
+                "min_pool_size": 2,
+                "max_pool_size": 20,
+                "server_selection_timeout_ms": 5000,
+                "read_preference": "primaryPreferred",
+                "write_concern": {"w": "majority", "wtimeout_ms": 2000},
+            },
+        }
+
+    def test_client_options(self):
+        options = MongoSettings.from_config(self.config).client_options()
+        self.assertEqual(
+            options,
+            {
+                "compressors": "zstd,zlib",
+                "zlibCompressionLevel": 6,
+                "minPoolSize": 2,
+                "maxPoolSize": 20,
+                "serverSelectionTimeoutMS": 5000,
+                "readPreference": "primaryPreferred",
+                "w": "majority",
+                "wTimeoutMS": 2000,
+            },
+        )
+
+    def test_defaults_leave_the_driver_alone(self):
+        self.assertEqual(MongoSettings.from_config({}).client_options(), {})
+
+    def test_client_is_configured(self):
+        # Clients connect lazily, building one needs no server
+        self.config["mongo"]["compressors"] = ["zlib"]
+        client = create_client(URI, MongoSettings.from_config(self.config))
+        try:
+            self.assertEqual(client.options.pool_options.max_pool_size, 20)
+            self.assertEqual(client.options.pool_options.min_pool_size, 2)
+            self.assertEqual(client.options.server_selection_timeout, 5)
+            self.assertEqual(client.read_preference.mongos_mode, "primaryPreferred")
+            self.assertEqual(client.write_concern.document["w"], "majority")
+        finally:
+            client.close()
+
+    def test_invalid_settings(self):
+        for section in [
+            {"max_pool_size": "20"},
+            {"max_pool_size": True},
+            {"connect_timeout_ms": -1},
+            {"zlib_level": 10},
+            {"compressors": ["lz4"]},
+            {"read_preference": "fastest"},
+            {"write_concern": {"fsync": True}},
+            {"pool": {"max_size": 20}},
+        ]:
+            with self.subTest(section=section), self.assertRaises(ValueError):
+                MongoSettings.from_config({"mongo": section})
+
+
+if __name__ == "__main__":
+    unittest.main()
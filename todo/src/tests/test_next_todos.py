@@ -0,0 +1,89 @@
+import os
+import random
+import sqlite3
+import string
+import tempfile
+import unittest
+
+from todo.src.app import (
+    add_todo,
+    backfill_ranks,
+    drop_user_collection,
+    mark_as_done,
+    next_todos,
+)
+from todo.src.storage.sqlite import SqliteBackend
+
+
+def get_random_string(length):
+    letters = string.ascii_lowercase
+    return "".join(random.choice(letters) for i in range(length))
+
+
+class TestNextTodos(unittest.TestCase):
+    def setUp(self):
+        self.user = get_random_string(20)
+        add_todo(self.user, "low soon", "low", "2022-01-01")
+        add_todo(self.user, "high later", "high", "2024-02-07")
+        add_todo(self.user, "high sooner", "high", "2022-12-31")
+        add_todo(self.user, "medium", "medium", "2023-10-05")
+        done = add_todo(self.user, "high done", "high", "2022-01-01")
+        mark_as_done(self.user, done)
+
+    def tearDown(self):
+        drop_user_collection(self.user)
+
+    def test_priority_then_end_date(self):
+        self.assertEqual(
+            [todo.todo for todo in next_todos(self.user, 10)],
+            ["high sooner", "high later", "medium", "low soon"],
+        )
+
+    def test_count(self):
+        self.assertEqual(
+            [todo.todo for todo in next_todos(self.user, 2)],
+            ["high sooner", "high later"],
+        )
+
+    def test_backfill_is_a_no_op_for_new_todos(self):
+        self.assertEqual(backfill_ranks([self.user]), {self.user: 0})
+
+
+class TestRankUpgrade(unittest.TestCase):
+    def test_existing_databases_are_backfilled(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "todo.db")
+            connection = sqlite3.connect(path)
+            connection.execute(
+                "CREATE TABLE todos (id TEXT PRIMARY KEY, user TEXT NOT NULL,"
+                " todo TEXT NOT NULL, priority TEXT NOT NULL, end_date TEXT,"
+                " done INTEGER NOT NULL DEFAULT 0)"
+            )
+            connection.executemany(
+                "INSERT INTO todos VALUES (?, 'alice', ?, ?, NULL, 0)",
+                [
+                    ("6ad300000000000000000001", "a", "low"),
+                    ("6ad300000000000000000002", "b", "high"),
+                ],
+            )
+            connection.commit()
+            connection.close()
+
+            backend = SqliteBackend(path)
+            try:
+                todos = list(backend.most_urgent("alice", 5))
+                plan = backend.connection.execute(
+                    "EXPLAIN QUERY PLAN SELECT id FROM todos WHERE user = ?"
+                    " AND done = 0 ORDER BY priority_rank DESC, end_date, id",
+                    ("alice",),
+                ).fetchall()
+            finally:
+                backend.close()
+
+        self.assertEqual([todo.todo for todo in todos], ["b", "a"])
+        self.assertIn("todos_user_done_priority_rank", plan[0][3])
+        self.assertNotIn("TEMP B-TREE", " ".join(row[3] for row in plan))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import io
+import os
+import random
+import string
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from rich.console import Console
+
+from todo.__main__ import create_arg_parser
+from todo.src.app import add_todo, app, drop_user_collection
+from todo.src.profiling import MongoRecorder, TimedBackend, count_documents
+from todo.src.storage import get_backend
+
+
+def get_random_string(length):
+    letters = string.ascii_lowercase
+    return "".join(random.choice(letters) for i in range(length))
+
+
+class TestProfile(unittest.TestCase):
+    def setUp(self):
+        self.user = get_random_string(10)
+        add_todo(self.user, "profiled", "low")
+
+    def tearDown(self):
+        drop_user_collection(self.user)
+
+    def run_app(self, *argv) -> str:
+        args = create_arg_parser().parse_args(argv)
+        args.started = time.perf_counter()
+        output = io.StringIO()
+        app(Console(file=output, width=120), args)
+        return output.getvalue()
+
+    def test_phases_are_printed(self):
+        output = self.run_app("--profile", "list", self.user)
+
+        self.assertIn("profiled", output)
+        for phase in ["startup and imports", "storage", "rendering", "total"]:
+            self.assertIn(phase, output)
+        self.assertNotIsInstance(get_backend(), TimedBackend)
+
+    def test_cprofile_dump(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "list.prof")
+            output = self.run_app(
+                "--profile", "--profile-dump", path, "stats", self.user
+            )
+
+            self.assertTrue(os.path.getsize(path) > 0)
+            self.assertIn(path, output)
+
+    def test_no_profile_by_default(self):
+        self.assertNotIn("Profile", self.run_app("list", self.user))
+
+    def test_count_documents(self):
+        self.assertEqual(count_documents({"cursor": {"firstBatch": [{}, {}]}}), 2)
+        self.assertEqual(count_documents({"cursor": {"nextBatch": [{}]}}), 1)
+        self.assertEqual(count_documents({"n": 3, "ok": 1}), 3)
+        self.assertEqual(count_documents({"ok": 1}), 0)
+
+    def test_server_selection_is_timed_once(self):
+        class Topology:
+            def __init__(self, readable):
+                self.readable = readable
+
+            def has_readable_server(self):
+                return self.readable
+
+        recorder = MongoRecorder()
+        recorder.topology_changed("other", Topology(True))
+        recorder.topology_opened("topology")
+        recorder.topology_changed("topology", Topology(False))
+        self.assertIsNone(recorder.server_selection)
+
+        recorder.topology_changed("topology", Topology(True))
+        selection = recorder.server_selection
+        self.assertGreaterEqual(selection, 0)
+        recorder.topology_changed("topology", Topology(True))
+        self.assertEqual(recorder.server_selection, selection)
+
+    def test_timed_backend_counts_iteration(self):
+        timed = TimedBackend(get_backend())
+        todos = timed.find(self.user)
+
+        self.assertEqual([todo.todo for todo in todos], ["profiled"])
+        self.assertEqual(timed.calls, 1)
+        self.assertGreater(timed.ms, 0)
+
+    def test_concurrent_calls_count_once(self):
+        class SlowBackend:
+            def wait(self):
+                time.sleep(0.05)
+
+        timed = TimedBackend(SlowBackend())
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda _: timed.wait(), range(8)))
+
+        self.assertEqual(timed.calls, 8)
+        self.assertGreaterEqual(timed.ms, 50)
+        # Summing every call would give at least 400 ms
+        self.assertLess(timed.ms, 300)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import io
+import random
+import string
+import unittest
+from contextlib import redirect_stderr
+
+from rich.console import Console
+
+from todo.__main__ import create_arg_parser
+from todo.src import add_todo, drop_user_collection
+from todo.src.shell import TodoShell
+
+
+def get_random_string(length):
+    letters = string.ascii_lowercase
+    return "".join(random.choice(letters) for i in range(length))
+
+
+class TestShell(unittest.TestCase):
+    def setUp(self):
+        self.user = get_random_string(10)
+        self.output = io.StringIO()
+        self.shell = TodoShell(
+            Console(file=self.output, width=120), self.user, create_arg_parser()
+        )
+
+    def tearDown(self):
+        drop_user_collection(self.user)
+
+    def test_commands_run_for_the_user(self):
+        self.shell.onecmd("add 'buy some milk' -p high")
+        self.shell.onecmd("list --sort")
+
+        self.assertIn("Todo added successfully", self.output.getvalue())
+        self.assertIn("buy some milk", self.output.getvalue())
+
+    def test_bad_arguments_keep_the_shell_running(self):
+        with redirect_stderr(io.StringIO()):
+            self.assertFalse(self.shell.onecmd("add"))
+            self.assertFalse(self.shell.onecmd("list --priority urgent"))
+        self.assertFalse(self.shell.onecmd("add 'unbalanced"))
+        self.assertIn("ERROR", self.output.getvalue())
+
+    def test_ids_are_completed(self):
+        todo_id = add_todo(self.user, "a", "low")
+
+        self.assertEqual(self.shell.complete_done(todo_id[:6], "", 0, 0), [todo_id])
+        self.assertEqual(self.shell.complete_delete("", "", 0, 0), [todo_id])
+
+    def test_writes_refresh_completions(self):
+        self.assertEqual(self.shell.complete_done("", "", 0, 0), [])
+
+        self.shell.onecmd("add 'a'")
+
+        self.assertEqual(len(self.shell.complete_done("", "", 0, 0)), 1)
+
+    def test_exit(self):
+        self.assertTrue(self.shell.onecmd("exit"))
+
+
+if __name__ == "__main__":
+    unittest.main()
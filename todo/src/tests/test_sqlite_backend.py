@@ -0,0 +1,63 @@
+import unittest
+from datetime import datetime
+
+from todo.src.model import Todo
+from todo.src.storage.sqlite import SqliteBackend
+
+
+class TestSqliteBackend(unittest.TestCase):
+    def setUp(self):
+        self.backend = SqliteBackend(":memory:")
+
+    def tearDown(self):
+        self.backend.close()
+
+    def add(self, user, todo, priority="low", end_date=None):
+        return self.backend.add(user, Todo(None, todo, priority, end_date, False))
+
+    def test_indexes_created(self):
+        indexes = {
+            row[0]
+            for row in self.backend.connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+        }
+        self.assertIn("todos_user_priority_end_date", indexes)
+        self.assertIn("todos_user_done_end_date", indexes)
+
+    def test_users_are_isolated(self):
+        self.add("alice", "a")
+        self.add("bob", "b")
+        self.backend.drop_user("alice")
+
+        self.assertEqual(len(list(self.backend.find("alice"))), 0)
+        self.assertEqual(len(list(self.backend.find("bob"))), 1)
+
+    def test_document_round_trip(self):
+        todo_id = self.add("alice", "a", "high", datetime(2024, 2, 7))
+        (todo,) = self.backend.find("alice")
+
+        self.assertEqual(todo, Todo(todo_id, "a", "high", datetime(2024, 2, 7), False))
+
+    def test_projection(self):
+        todo_id = self.add("alice", "a", "high", datetime(2024, 2, 7))
+        (todo,) = self.backend.find("alice", fields=("end_date",))
+
+        self.assertEqual(todo, Todo(todo_id, None, None, datetime(2024, 2, 7), None))
+
+    def test_mark_done_twice(self):
+        todo_id = self.add("alice", "a")
+        self.assertEqual(self.backend.mark_done("alice", todo_id), 1)
+        self.assertEqual(self.backend.mark_done("alice", todo_id), 0)
+
+    def test_filtered_listing_uses_index(self):
+        plan = self.backend.connection.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM todos WHERE user = ? AND priority = ?"
+            " ORDER BY end_date",
+            ("alice", "low"),
+        ).fetchall()
+        self.assertIn("todos_user_priority_end_date", str(plan))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+from datetime import datetime
+
+from bson.objectid import ObjectId
+
+from todo.src.model import Todo, projection
+
+
+class TestTodoModel(unittest.TestCase):
+    def setUp(self):
+        self.document = {
+            "_id": ObjectId(),
+            "todo": "test",
+            "priority": "low",
+            "end_date": datetime(2022, 12, 31),
+            "done": False,
+        }
+
+    def test_from_document(self):
+        todo = Todo.from_document(self.document)
+        self.assertEqual(todo.id, str(self.document["_id"]))
+        self.assertEqual(todo.end_date, datetime(2022, 12, 31))
+        self.assertFalse(todo.done)
+
+    def test_round_trip(self):
+        todo = Todo.from_document(self.document)
+        document = {"_id": self.document["_id"], **todo.to_document()}
+        self.assertEqual(document, self.document)
+
+    def test_partial_document(self):
+        todo = Todo.from_document({"_id": self.document["_id"], "done": True})
+        self.assertIsNone(todo.todo)
+        self.assertTrue(todo.done)
+
+    def test_item_access(self):
+        todo = Todo.from_document(self.document)
+        self.assertEqual(todo["_id"], todo.id)
+        self.assertEqual(todo["priority"], "low")
+        with self.assertRaises(KeyError):
+            todo["missing"]
+
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            Todo().missing = True
+
+    def test_projection(self):
+        self.assertEqual(projection(("todo", "done")), {"todo": 1, "done": 1})
+        self.assertIsNone(projection())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import random
+import string
+import unittest
+
+from todo.src.app import (
+    add_todo,
+    drop_user_collection,
+    make_filter,
+    mark_as_done,
+    todo_stats,
+)
+
+
+def get_random_string(length):
+    letters = string.ascii_lowercase
+    return "".join(random.choice(letters) for i in range(length))
+
+
+class TestTodoStats(unittest.TestCase):
+    def setUp(self):
+        self.user = get_random_string(20)
+        self.todo_ids = [
+            add_todo(self.user, "test0", "low", "2022-12-31"),
+            add_todo(self.user, "test1", "high", "2022-01-01"),
+            add_todo(self.user, "test2", "high", "2999-01-01"),
+            add_todo(self.user, "test3", "low"),
+        ]
+        mark_as_done(self.user, self.todo_ids[0])
+
+    def tearDown(self):
+        drop_user_collection(self.user)
+
+    def test_todo_stats(self):
+        stats = todo_stats(self.user)
+        self.assertEqual(stats["total"], 4)
+        self.assertEqual(stats["done"], 1)
+        self.assertEqual(stats["open"], 3)
+        self.assertEqual(stats["overdue"], 1)
+        self.assertEqual(stats["priorities"], {"low": 2, "high": 2})
+
+    def test_todo_stats_filtered(self):
+        stats = todo_stats(self.user, make_filter(priority="high"))
+        self.assertEqual(stats["total"], 2)
+        self.assertEqual(stats["priorities"], {"high": 2})
+
+    def test_todo_stats_empty(self):
+        drop_user_collection(self.user)
+        stats = todo_stats(self.user)
+        self.assertEqual(stats["total"], 0)
+        self.assertEqual(stats["priorities"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import io
+import random
+import string
+import unittest
+
+from bson.objectid import ObjectId
+from rich.console import Console
+
+from todo.src.app import add_todo, delete_todo, drop_user_collection, mark_as_done
+from todo.src.storage import TodoChange, get_backend
+from todo.src.storage.mongo import to_changes
+from todo.src.watch import TodoWatcher
+
+
+def get_random_string(length):
+    letters = string.ascii_lowercase
+    return "".join(random.choice(letters) for i in range(length))
+
+
+class FakeStream(list):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
+
+class TestWatchTodos(unittest.TestCase):
+    def setUp(self):
+        self.user = get_random_string(20)
+        self.first = add_todo(self.user, "test0", "low", "2022-12-31")
+        self.watcher = TodoWatcher(get_backend(), self.user)
+        self.watcher.load()
+
+    def tearDown(self):
+        drop_user_collection(self.user)
+
+    def test_load(self):
+        self.assertEqual(list(self.watcher.todos), [self.first])
+
+    def test_poll_applies_writes(self):
+        self.assertFalse(self.watcher.poll())
+
+        second = add_todo(self.user, "test1", "high")
+        mark_as_done(self.user, self.first)
+        self.assertTrue(self.watcher.poll())
+        self.assertTrue(self.watcher.todos[self.first].done)
+        self.assertEqual(self.watcher.todos[second].todo, "test1")
+
+        delete_todo(self.user, self.first)
+        self.assertTrue(self.watcher.poll())
+        self.assertEqual(list(self.watcher.todos), [second])
+
+    def test_apply(self):
+        todo = self.watcher.todos[self.first]
+        self.assertFalse(self.watcher.apply(TodoChange("upsert", todo.id, todo)))
+        self.assertFalse(self.watcher.apply(TodoChange("delete", "missing")))
+        self.assertTrue(self.watcher.apply(TodoChange("delete", todo.id)))
+        self.assertEqual(self.watcher.todos, {})
+
+    def test_render_limit(self):
+        add_todo(self.user, "test1", "high")
+        self.watcher.poll()
+        output = io.StringIO()
+        Console(file=output, width=120).print(self.watcher.render(1, "polling"))
+
+        # Sorted like listings, todos without an end date first
+        self.assertIn("test1", output.getvalue())
+        self.assertNotIn("test0", output.getvalue())
+        self.assertIn("2 todos, 0 done, showing the first 1", output.getvalue())
+
+    def test_mongo_events(self):
+        todo_id = ObjectId()
+        document = {"_id": todo_id, "todo": "test", "priority": "low", "done": True}
+        stream = FakeStream(
+            [
+                {
+                    "operationType": "insert",
+                    "documentKey": {"_id": todo_id},
+                    "fullDocument": document,
+                },
+                {"operationType": "update", "documentKey": {"_id": todo_id}},
+                {"operationType": "delete", "documentKey": {"_id": todo_id}},
+            ]
+        )
+        changes = list(to_changes(stream))
+
+        self.assertEqual(changes[0].operation, "upsert")
+        self.assertTrue(changes[0].todo.done)
+        self.assertEqual(
+            [(change.operation, change.todo_id) for change in changes[1:]],
+            [("delete", str(todo_id))] * 2,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import heapq
+import time
+from datetime import datetime
+from typing import Iterable
+
+from todo.src.app import add_rows, new_table
+from todo.src.model import ALL_FIELDS, CLOCK_SKEW, Todo, sort_key, utcnow
+from todo.src.storage import TodoBackend, TodoChange, TodoFilter, get_backend
+
+
+def live_backend() -> TodoBackend:
+    """The backend behind the read cache, whose entries may be ``ttl`` old"""
+    from todo.src.cache import CachedBackend
+
+    backend = get_backend()
+    return backend.backend if isinstance(backend, CachedBackend) else backend
+
+
+class TodoWatcher:
+    """In-memory copy of one user's todos, kept current by applying changes.
+
+    Changes come from the backend's change stream when it has one. Otherwise
+    ``poll`` fetches the todos written since the previous poll (by
+    ``updated_at``) and only lists ids when the count shows a delete.
+    """
+
+    def __init__(self, backend: TodoBackend, user: str):
+        self.backend = backend
+        self.user = user
+        self.todos = {}
+        self.stream = None
+        self.polled = None
+
+    def load(self) -> None:
+        # The stream is opened first so that no change is lost in between,
+        # replaying one that is already loaded is harmless.
+        self.stream = self.backend.watch(self.user)
+        self.polled = utcnow()
+        self.todos = {
+            todo.id: todo for todo in self.backend.find(self.user, fields=ALL_FIELDS)
+        }
+
+    def apply(self, change: TodoChange) -> bool:
+        """Apply one change, returning whether the todos changed"""
+        if change.operation == "delete":
+            return self.todos.pop(change.todo_id, None) is not None
+        if self.todos.get(change.todo_id) == change.todo:
+            return False
+        self.todos[change.todo_id] = change.todo
+        return True
+
+    def poll(self) -> bool:
+        since, self.polled = self.polled - CLOCK_SKEW, utcnow()
+        written = self.backend.find(
+            self.user, TodoFilter(updated_since=since), fields=ALL_FIELDS
+        )
+        changed = False
+        for todo in written:
+            changed |= self.apply(TodoChange("upsert", todo.id, todo))
+
+        if self.backend.count(self.user) != len(self.todos):
+            ids = {todo.id for todo in self.backend.find(self.user, fields=("done",))}
+            for todo_id in [todo_id for todo_id in self.todos if todo_id not in ids]:
+                changed |= self.apply(TodoChange("delete", todo_id))
+        return changed
+
+    def first(self, limit: int) -> list[Todo]:
+        return heapq.nsmallest(limit, self.todos.values(), key=sort_key)
+
+    def render(self, limit: int, source: str):
+        from rich.console import Group
+        from rich.text import Text
+
+        table = new_table()
+        add_rows(table, self.first(limit))
+        done = sum(1 for todo in self.todos.values() if todo.done)
+        shown = f", showing the first {limit}" if len(self.todos) > limit else ""
+        status = (
+            f"{len(self.todos)} todos, {done} done{shown} - {source}, "
+            f"updated {datetime.now():%H:%M:%S}"
+        )
+        return Group(table, Text(status, style="dim", justify="center"))
+
+
+def changes(watcher: TodoWatcher, interval: float) -> Iterable[bool]:
+    """Yield whether the todos changed, after every change or poll"""
+    if watcher.stream is not None:
+        for change in watcher.stream:
+            yield watcher.apply(change)
+    while True:
+        time.sleep(interval)
+        yield watcher.poll()
+
+
+def watch_todos(console, user: str, interval: float = 2.0, limit: int = 100):
+    """Render the user's todos once, then again whenever they change"""
+    from rich.live import Live
+
+    watcher = TodoWatcher(live_backend(), user)
+    watcher.load()
+    source = (
+        "change stream" if watcher.stream is not None else f"polling every {interval}s"
+    )
+    with Live(
+        watcher.render(limit, source), console=console, auto_refresh=False
+    ) as live:
+        for changed in changes(watcher, interval):
+            if changed:
+                live.update(watcher.render(limit, source), refresh=True)